@@ -1,7 +1,8 @@
 """
 API package for the metrics collection application.
-Contains classes for API authentication and remote control.
+Contains classes for API authentication, remote control and response caching.
 """
 
 from .auth import require_auth, generate_token
-from .remote_control import RemoteControl 
\ No newline at end of file
+from .remote_control import RemoteControl
+from .response_cache import ResponseCache
\ No newline at end of file
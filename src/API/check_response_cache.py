@@ -0,0 +1,66 @@
+import copy
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from config.config_loader import get_config
+from main import build_registry, create_app
+
+
+def dashboard_url(device_name, metric_name, now):
+    """The history URL the dashboard's getDateRange() builds for the last 24h at `now`."""
+    start = (now - timedelta(hours=24)).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    end = now.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return (f"/api/device/{device_name}/metric/{metric_name}/history"
+            f"?start_time={start}&end_time={end}&interval=1h&aggregate=true")
+
+
+def run_checks():
+    """
+    Replay dashboard-shaped requests against the app on a scratch database.
+    Returns (description, passed) rows.
+    """
+    workdir = tempfile.mkdtemp()
+    components = None
+    try:
+        config = copy.deepcopy(get_config())
+        config['database']['path'] = os.path.join(workdir, 'check.db')
+        components = build_registry(config)
+        app = create_app(config, components, start=False)
+        database = components.get('database')
+        response_cache = components.get('response_cache')
+        client = app.test_client()
+
+        # Stay clear of a granularity boundary so both requests fall in one bucket
+        now = datetime.now().replace(second=10, microsecond=0)
+        database.store_samples([("PC", "CPU Usage", 12.5, now - timedelta(minutes=5))])
+
+        first = client.get(dashboard_url("PC", "CPU Usage", now))
+        before = response_cache.stats()
+        second = client.get(dashboard_url("PC", "CPU Usage", now + timedelta(seconds=5)))
+        after = response_cache.stats()
+
+        database.store_samples([("PC", "CPU Usage", 50.0, now)])
+        third = client.get(dashboard_url("PC", "CPU Usage", now + timedelta(seconds=8)))
+
+        return [
+            ("first request succeeds", first.status_code == 200),
+            ("request 5s later is a cache hit", after['hits'] == before['hits'] + 1),
+            ("cached response matches", second.get_data() == first.get_data()),
+            ("a new sample invalidates the entry", third.get_data() != first.get_data()),
+        ]
+    finally:
+        if components is not None:
+            components.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    results = run_checks()
+    failures = 0
+    for description, passed in results:
+        print(f"[{'ok' if passed else 'FAIL'}] {description}")
+        failures += not passed
+    print(f"\n{len(results)} checks, {failures} failed")
+    sys.exit(1 if failures else 0)
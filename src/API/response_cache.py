@@ -0,0 +1,236 @@
+import hashlib
+import threading
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import Response, request
+from Database.timeutil import to_epoch_ms
+
+# Query parameters holding a time bound, floored to time_granularity in cache keys
+TIME_PARAMS = ('start_time', 'end_time')
+
+
+class _Entry:
+    __slots__ = ('body', 'mimetype', 'etag', 'tags', 'created')
+
+    def __init__(self, body, mimetype, etag, tags, created):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.tags = tags
+        self.created = created
+
+
+def device_tag(device_name):
+    """Tag for responses built from any metric of a device."""
+    return ('device', device_name)
+
+
+def series_tag(device_name, metric_name):
+    """Tag for responses built from one device/metric series."""
+    return ('series', device_name, metric_name)
+
+
+class ResponseCache:
+    """
+    LRU cache of rendered responses for read-only API endpoints.
+
+    Entries are keyed by endpoint, URL arguments and normalized query
+    parameters (time bounds floored to time_granularity seconds, since clients
+    send "now" to the second), and bounded by entry count and total body
+    size, evicting the least recently used first. Each entry is tagged with the devices or
+    device/metric series it was built from; on_write(), registered as a
+    Database write listener, drops the entries tagged with whatever was just
+    written. ttl is a backstop for changes that aren't writes (retention
+    purges).
+
+    Responses carry a content ETag, so a client sending a matching
+    If-None-Match gets a 304 without the body.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=300.0, time_granularity=60,
+                 enabled=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.time_granularity = time_granularity
+        self.enabled = enabled
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # key -> _Entry, least recently used first
+        self._by_tag = defaultdict(set)     # tag -> keys
+        self._tag_versions = defaultdict(int)
+        self._bytes = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'not_modified': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0,
+            'invalidations': 0,
+            'stale_discards': 0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a cache from the server.response_cache config section."""
+        return cls(
+            max_entries=config.get('max_entries', 512),
+            max_bytes=config.get('max_bytes', 32 * 1024 * 1024),
+            ttl=config.get('ttl', 300.0),
+            time_granularity=config.get('time_granularity', 60),
+            enabled=config.get('enabled', True)
+        )
+
+    def make_key(self, endpoint, view_args, args):
+        """
+        Cache key for a request: the endpoint, its URL arguments and its query
+        parameters sorted, with empty values dropped (the history endpoints
+        treat them as absent) and time bounds floored to time_granularity.
+        Requests whose ranges differ only within that granularity share an
+        entry; new samples invalidate it regardless.
+        """
+        params = tuple(sorted(
+            (name, self._normalize(name, value))
+            for name, value in args.items(multi=True) if value != ''
+        ))
+        return (endpoint, tuple(sorted((view_args or {}).items())), params)
+
+    def _normalize(self, name, value):
+        if name not in TIME_PARAMS or not self.time_granularity:
+            return value
+        try:
+            epoch_ms = to_epoch_ms(value)
+        except (TypeError, ValueError):
+            return value
+        return epoch_ms // int(self.time_granularity * 1000)
+
+    def cached(self, tags):
+        """
+        Decorator for a Flask view: serve its 200 responses from the cache.
+        tags(**view_args) returns the tags to invalidate the entry by.
+        """
+        def decorator(view):
+            if not self.enabled:
+                return view
+
+            @wraps(view)
+            def decorated(*args, **kwargs):
+                key = self.make_key(request.endpoint, request.view_args, request.args)
+                entry = self._get(key)
+                if entry is None:
+                    entry_tags = frozenset(tags(**kwargs))
+                    versions = self._versions(entry_tags)
+                    response = view(*args, **kwargs)
+                    if not isinstance(response, Response) or response.status_code != 200:
+                        return response
+                    entry = self._put(key, response, entry_tags, versions)
+                return self._respond(entry)
+            return decorated
+        return decorator
+
+    def _respond(self, entry):
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        # Let browsers keep the body but revalidate it (cheaply, by ETag) every time
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self._stats['not_modified'] += 1
+        return response
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created > self.ttl:
+                self._remove(key)
+                self._stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def _versions(self, tags):
+        with self._lock:
+            return {tag: self._tag_versions[tag] for tag in tags}
+
+    def _put(self, key, response, tags, versions):
+        """Store a rendered response unless one of its tags was invalidated while it was built."""
+        body = response.get_data()
+        entry = _Entry(body, response.mimetype, hashlib.sha1(body).hexdigest(), tags, time.monotonic())
+        if len(body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if any(self._tag_versions[tag] != version for tag, version in versions.items()):
+                # Built from data that changed meanwhile: serve it, but don't keep it
+                self._stats['stale_discards'] += 1
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in tags:
+                self._by_tag[tag].add(key)
+            self._stats['stores'] += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return entry
+
+    def _remove(self, key):
+        """Drop an entry and its tag index. The lock must be held."""
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def invalidate(self, tags):
+        """Drop every entry carrying any of tags. Returns the number dropped."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                self._tag_versions[tag] += 1
+                keys.update(self._by_tag.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += len(keys)
+        return len(keys)
+
+    def on_write(self, series):
+        """Database write listener: invalidate responses built from the written (device, metric) series."""
+        tags = set()
+        for device_name, metric_name in series:
+            tags.add(device_tag(device_name))
+            tags.add(series_tag(device_name, metric_name))
+        self.invalidate(tags)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters, hit rate and the current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
@@ -0,0 +1,6 @@
+"""
+App package for the metrics collection application.
+Contains the registry of long-lived components shared by the Flask routes.
+"""
+
+from .registry import ComponentRegistry
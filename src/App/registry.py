@@ -0,0 +1,80 @@
+import threading
+import logging
+
+
+class ComponentRegistry:
+    """
+    Long-lived application components (database, writer, collectors, ...)
+    shared by every route and background job.
+    Components are registered as factories and built once, on first get().
+    A factory receives the registry, so it can get() the components it
+    depends on; close() tears components down in reverse order of creation,
+    so each one is closed before the components it was built from.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._factories = {}  # name -> (factory, close)
+        self._instances = {}
+        self._created = []    # names in order of creation
+
+    def register(self, name, factory, close=None):
+        """Register factory(registry) to build name; close(instance) tears it down."""
+        with self._lock:
+            if name in self._instances:
+                raise ValueError(f"Component {name!r} has already been created")
+            self._factories[name] = (factory, close)
+
+    def add(self, name, instance, close=None):
+        """Register an instance that has already been built."""
+        with self._lock:
+            self._factories[name] = (None, close)
+            self._instances[name] = instance
+            self._created.append(name)
+
+    def get(self, name):
+        """Return the component, building it (and its dependencies) on first use."""
+        try:
+            # Built components are read without the lock: dict lookups are atomic
+            return self._instances[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(f"Unknown component: {name}")
+            factory, _ = self._factories[name]
+            instance = factory(self)
+            self._instances[name] = instance
+            self._created.append(name)
+            self.logger.debug(f"Created component {name}")
+            return instance
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def stats(self):
+        """Return the registered components and the ones built so far, in creation order."""
+        with self._lock:
+            return {
+                'registered': sorted(self._factories),
+                'created': list(self._created)
+            }
+
+    def close(self):
+        """Close every built component, most recently created first."""
+        with self._lock:
+            while self._created:
+                name = self._created.pop()
+                instance = self._instances.pop(name)
+                close = self._factories[name][1]
+                if close is None:
+                    continue
+                try:
+                    close(instance)
+                except Exception as e:
+                    self.logger.error(f"Error closing component {name}: {str(e)}")
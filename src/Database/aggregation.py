@@ -0,0 +1,129 @@
+import re
+from datetime import datetime, timedelta
+from .timeutil import from_epoch_ms, to_epoch_ms
+
+# Bucket widths in seconds, keyed by the interval names the API accepts
+BUCKET_WIDTHS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+    '1w': 7 * 24 * 60 * 60,
+}
+
+# Names used by the history dashboard before arbitrary widths were supported
+INTERVAL_ALIASES = {
+    'minute': '1m',
+    'hour': '1h',
+    'day': '1d',
+    'week': '1w',
+}
+
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+INTERVAL_PATTERN = re.compile(r'^(\d+)\s*([smhdw])$')
+
+# The epoch started on a Thursday; week buckets are shifted to start on Monday
+WEEK_ORIGIN = 4 * 24 * 60 * 60
+
+# Widths of whole days are calendar buckets, starting at local midnight
+DAY = 24 * 60 * 60
+LOCAL_EPOCH = datetime(1970, 1, 1)
+
+DEFAULT_INTERVAL = '1h'
+
+
+def parse_interval(interval):
+    """
+    Convert an interval name ('1m', '5m', '1h', '1d', '1w', 'hour', ...) or any
+    '<count><s|m|h|d|w>' string to a bucket width in seconds.
+    Unknown intervals fall back to hourly buckets.
+    """
+    interval = INTERVAL_ALIASES.get(interval, interval)
+    if interval in BUCKET_WIDTHS:
+        return BUCKET_WIDTHS[interval]
+
+    match = INTERVAL_PATTERN.match(str(interval or '').strip().lower())
+    if match and int(match.group(1)) > 0:
+        return int(match.group(1)) * UNIT_SECONDS[match.group(2)]
+    return BUCKET_WIDTHS[DEFAULT_INTERVAL]
+
+
+def bucket_origin(width):
+    """Return the epoch offset buckets of this width are aligned to."""
+    return WEEK_ORIGIN if width % BUCKET_WIDTHS['1w'] == 0 else 0
+
+
+def is_calendar_width(width):
+    """Return True if buckets of this width are whole local days (days, weeks)."""
+    return width % DAY == 0
+
+
+def bucket_expression(epoch_ms_column, width):
+    """
+    SQL expression flooring an epoch-milliseconds column to its bucket start.
+    Integer division keeps the whole computation inside SQLite. Day and week
+    buckets are floored on local wall-clock time, so they start at local
+    midnight (DST included) like the calendar days the dashboard shows.
+    """
+    origin = bucket_origin(width)
+    if is_calendar_width(width):
+        local = f"CAST(strftime('%s', {epoch_ms_column} / 1000, 'unixepoch', 'localtime') AS INTEGER)"
+        floored = f"(({local} - {origin}) / {width}) * {width} + {origin}"
+        return f"CAST(strftime('%s', {floored}, 'unixepoch', 'utc') AS INTEGER) * 1000"
+    origin = origin * 1000
+    width = width * 1000
+    return f"(({epoch_ms_column} - {origin}) / {width}) * {width} + {origin}"
+
+
+def bucket_start(ts, width):
+    """Python counterpart of bucket_expression for a single epoch-milliseconds value."""
+    if not is_calendar_width(width):
+        width_ms = width * 1000
+        return ts - ts % width_ms
+    origin = bucket_origin(width)
+    local = int((from_epoch_ms(ts) - LOCAL_EPOCH).total_seconds())
+    floored = ((local - origin) // width) * width + origin
+    return to_epoch_ms(LOCAL_EPOCH + timedelta(seconds=floored))
+
+
+def aggregate_query(width, rollup_table=None):
+    """
+    Build the bucketed aggregation over one device/metric and time range, read
+    from raw samples or from a rollup table whose buckets tile `width`.
+    Parameters are (device_id, metric_id, start_ms, end_ms); each row is
+    (time_bucket, avg, min, max, count, sum, last).
+    """
+    if rollup_table:
+        source = f"""
+            SELECT {bucket_expression('bucket', width)} AS bucket,
+                   value_count AS cnt, value_sum AS total, value_min AS low,
+                   value_max AS high, last_ts, last_value
+            FROM {rollup_table}
+            WHERE device_id = ? AND metric_id = ? AND bucket BETWEEN ? AND ?
+        """
+    else:
+        source = f"""
+            SELECT {bucket_expression('ts', width)} AS bucket,
+                   1 AS cnt, value AS total, value AS low,
+                   value AS high, ts AS last_ts, value AS last_value
+            FROM device_metrics
+            WHERE device_id = ? AND metric_id = ? AND ts BETWEEN ? AND ?
+        """
+
+    return f"""
+        SELECT
+            datetime(bucket / 1000, 'unixepoch', 'localtime') AS time_bucket,
+            SUM(total) / SUM(cnt) AS avg_value,
+            MIN(low) AS min_value,
+            MAX(high) AS max_value,
+            SUM(cnt) AS count,
+            SUM(total) AS sum_value,
+            MAX(CASE WHEN recency = 1 THEN last_value END) AS last_value
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY last_ts DESC) AS recency
+            FROM ({source})
+        )
+        GROUP BY bucket
+        ORDER BY bucket ASC
+    """
@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from .database import Database
+
+LIMITS = (100, 1000, 10000)
+
+
+def legacy_get_system_metrics(db, limit=100):
+    """The previous N+1 implementation (on the ts column): one query per timestamp."""
+    device_id = db.get_device_id("PC")
+
+    with db.pool.reader() as conn:
+        cursor = conn.execute("""
+            SELECT DISTINCT ts, timestamp
+            FROM device_metrics
+            WHERE device_id = ? AND ts IS NOT NULL
+            ORDER BY ts DESC
+            LIMIT ?
+        """, (device_id, limit))
+
+        result = []
+        for ts, timestamp in cursor.fetchall():
+            cursor = conn.execute("""
+                SELECT m.metric_name, dm.value
+                FROM device_metrics dm
+                JOIN metrics m ON dm.metric_id = m.metric_id
+                WHERE dm.device_id = ? AND dm.ts = ?
+            """, (device_id, ts))
+
+            metrics = {}
+            for metric_name, value in cursor.fetchall():
+                metrics[metric_name.lower().replace(' ', '_')] = value
+            metrics['timestamp'] = timestamp
+            result.append(metrics)
+        return result
+
+
+def seed_history(db, count):
+    """Write `count` system snapshots, one every 10 seconds."""
+    start = datetime(2025, 1, 1)
+    samples = []
+    for i in range(count):
+        samples += db.build_system_samples({
+            'timestamp': (start + timedelta(seconds=10 * i)).isoformat(),
+            'cpu_percent': i % 100,
+            'memory_percent': 50,
+            'disk_percent': 60,
+            'running_processes': 300,
+            'thread_count': 2000
+        })
+    db.store_samples(samples)
+
+
+def time_call(func, repeat=3):
+    """Return the best wall time of `repeat` calls, in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(snapshots=20000):
+    """Time the N+1 and single-query history reads at each limit."""
+    workdir = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(workdir, 'benchmark.db'))
+        seed_history(db, snapshots)
+
+        results = []
+        for limit in LIMITS:
+            # Both implementations must agree before their timings mean anything
+            if legacy_get_system_metrics(db, limit) != db.get_system_metrics(limit):
+                raise AssertionError(f"Results differ at limit={limit}")
+            before = time_call(lambda: legacy_get_system_metrics(db, limit))
+            after = time_call(lambda: db.get_system_metrics(limit))
+            results.append((limit, before, after))
+        db.close()
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"get_system_metrics over {snapshots} snapshots ({snapshots * 5} rows)")
+    print(f"{'limit':>8} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for limit, before, after in run_benchmark(snapshots):
+        print(f"{limit:>8} {before:>12.1f} {after:>12.1f} {before / after:>7.1f}x")
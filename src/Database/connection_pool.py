@@ -0,0 +1,221 @@
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    SQLite connection pool.
+    Reads check a connection out of a bounded free-list of long-lived reader
+    connections and return it when done, so readers outlive the (often
+    short-lived, one per request) threads that use them. At most max_readers
+    are open; further readers wait up to timeout seconds for one to be
+    returned. All writes go through a single dedicated writer connection
+    serialized by a lock.
+    """
+
+    # Applied once to every connection when it is opened
+    PRAGMAS = (
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 134217728",
+    )
+
+    def __init__(self, db_path, timeout=30.0, max_readers=8):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.max_readers = max_readers
+        self.logger = logging.getLogger(__name__)
+
+        # Idle readers, most recently returned first so the warmest page cache is reused
+        self._idle = queue.LifoQueue()
+        self._reader_count = 0
+        self._closed = False
+        # Nested reader blocks on one thread reuse the connection already checked out
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # The writer is shared across threads, so it is guarded by a re-entrant
+        # lock (nested writer blocks on the same thread join the outer transaction)
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'reader_waits': 0,
+            'reader_wait_time': 0.0,
+            'opened': 0,
+        }
+
+        # Open the writer eagerly so WAL mode is switched on before any reader.
+        # Incremental auto-vacuum only takes effect on a new database (or after a
+        # full VACUUM), so it has to be requested before anything is written
+        self._writer = self._open()
+        self._writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._writer.execute("PRAGMA journal_mode = WAL")
+
+    def _open(self):
+        """Open a new connection with the pool pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._stats['opened'] += 1
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Check a reader connection out of the pool for the duration of the block."""
+        conn = getattr(self._local, 'reader', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._checkout()
+        self._local.reader = conn
+        try:
+            yield conn
+        finally:
+            self._local.reader = None
+            self._checkin(conn)
+
+    def _checkout(self):
+        """Take an idle reader, open a new one below max_readers, or wait for one."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats['hits'] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._reader_count < self.max_readers
+            if can_open:
+                self._reader_count += 1
+                self._stats['misses'] += 1
+        if can_open:
+            try:
+                return self._open()
+            except BaseException:
+                with self._lock:
+                    self._reader_count -= 1
+                raise
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for one of {self.max_readers} reader connections"
+            )
+        with self._lock:
+            self._stats['reader_waits'] += 1
+            self._stats['reader_wait_time'] += time.perf_counter() - started
+        return conn
+
+    def _checkin(self, conn):
+        """Return a reader to the free-list, or close it if the pool has been closed."""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._reader_count -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def writer(self):
+        """
+        Yield the shared writer connection inside a transaction.
+        The transaction is committed when the outermost writer block exits and
+        rolled back if it raises.
+        """
+        if not self._writer_lock.acquire(blocking=False):
+            started = time.perf_counter()
+            self._writer_lock.acquire()
+            with self._lock:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += time.perf_counter() - started
+        try:
+            if self._writer is None:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+
+            outermost = self._writer_depth == 0
+            if outermost:
+                # Only count the block once its transaction is open, so a failed
+                # BEGIN (database locked by another process) leaves no depth behind
+                self._writer.execute("BEGIN IMMEDIATE")
+            self._writer_depth += 1
+            try:
+                yield self._writer
+                if outermost:
+                    self._writer.execute("COMMIT")
+            except BaseException:
+                # Also covers a failed COMMIT, which can leave the transaction open
+                if outermost and self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                raise
+            finally:
+                self._writer_depth -= 1
+        finally:
+            self._writer_lock.release()
+
+    @contextmanager
+    def maintenance(self):
+        """
+        Yield the writer connection with the writer lock held but no transaction
+        open, for statements that can't run inside one (VACUUM, incremental_vacuum).
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._writer_depth:
+                raise sqlite3.ProgrammingError("Maintenance can't run inside a write transaction")
+            yield self._writer
+
+    def stats(self):
+        """Return pool usage counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            readers = self._reader_count
+        stats['open_readers'] = readers
+        stats['idle_readers'] = self._idle.qsize()
+        stats['max_readers'] = self.max_readers
+        stats['open_connections'] = readers + (1 if self._writer is not None else 0)
+        return stats
+
+    def close(self):
+        """Close the writer and every idle reader; checked-out readers close when returned."""
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
@@ -3,6 +3,78 @@ from datetime import datetime, timedelta
 import json
 import os
 import logging
+from .connection_pool import ConnectionPool
+from .id_cache import IdCache
+from .aggregation import parse_interval, aggregate_query, bucket_start
+from .timeutil import to_epoch_ms, to_timestamp_text
+from .rollups import update_rollups, choose_rollup
+from .migrations import migrate
+
+# Table, id column and name column for each kind of cached ID
+ID_TABLES = {
+    'device': ('devices', 'device_id', 'device_name'),
+    'metric': ('metrics', 'metric_id', 'metric_name'),
+}
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+MAX_QUERY_PARAMS = 500
+
+# Field in the metrics dict -> metric name, for system and stock metrics
+SYSTEM_METRIC_FIELDS = (
+    ('cpu_percent', 'CPU Usage'),
+    ('memory_percent', 'Memory Usage'),
+    ('disk_percent', 'Disk Usage'),
+    ('running_processes', 'Running Processes'),
+    ('thread_count', 'Thread Count'),
+)
+
+STOCK_METRIC_FIELDS = (
+    ('price', 'Price'),
+    ('volume', 'Volume'),
+    ('change', 'Change'),
+    ('change_percent', 'Change Percent'),
+    ('market_cap', 'Market Cap'),
+)
+
+# Per-mountpoint usage and per-disk I/O fields -> metric name, for disk metrics
+DISK_USAGE_FIELDS = (
+    ('percent', 'Disk Usage'),
+    ('used', 'Disk Used'),
+    ('free', 'Disk Free'),
+)
+
+DISK_IO_FIELDS = (
+    ('read_bytes_per_sec', 'Disk Read Rate'),
+    ('write_bytes_per_sec', 'Disk Write Rate'),
+    ('read_iops', 'Disk Read IOPS'),
+    ('write_iops', 'Disk Write IOPS'),
+    ('await_ms', 'Disk Await'),
+    ('busy_percent', 'Disk Busy'),
+)
+
+NETWORK_IO_FIELDS = (
+    ('bytes_sent_per_sec', 'Network Sent Rate'),
+    ('bytes_recv_per_sec', 'Network Received Rate'),
+    ('packets_sent_per_sec', 'Network Packets Sent'),
+    ('packets_recv_per_sec', 'Network Packets Received'),
+    ('errors_in_per_sec', 'Network Errors In'),
+    ('errors_out_per_sec', 'Network Errors Out'),
+    ('drops_in_per_sec', 'Network Drops In'),
+    ('drops_out_per_sec', 'Network Drops Out'),
+)
+
+# Top-N process rankings -> device prefix, and per-process fields -> metric name.
+# Processes are stored by rank slot rather than by pid, so pid churn never adds devices
+PROCESS_RANKINGS = (
+    ('top_cpu', 'Process-Top-CPU'),
+    ('top_memory', 'Process-Top-Memory'),
+)
+
+PROCESS_FIELDS = (
+    ('cpu_percent', 'Process CPU'),
+    ('rss', 'Process RSS'),
+    ('pid', 'Process PID'),
+)
 
 class Database:
     """
@@ -20,192 +92,286 @@ class Database:
             
         self.logger = logging.getLogger(__name__)
         self.timeout = 30.0  # Set a generous timeout for database operations
+        self.pool = ConnectionPool(self.db_path, timeout=self.timeout)
+        self.id_cache = IdCache()
+        self._write_listeners = []
         self.init_database()
+        self.preload_ids()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.close()
+
+    def pool_stats(self):
+        """Return connection pool statistics (hits, waits, open connections)."""
+        return self.pool.stats()
+
+    def add_write_listener(self, listener):
+        """
+        Call listener(series) after every committed store_samples, with the set
+        of (device_name, metric_name) pairs written (e.g. to invalidate caches).
+        """
+        # Replaced rather than appended to, so writers iterate it without a lock
+        self._write_listeners = self._write_listeners + [listener]
+
+    def _notify_write(self, series):
+        for listener in self._write_listeners:
+            try:
+                listener(series)
+            except Exception as e:
+                self.logger.error(f"Error in write listener: {str(e)}")
 
     def init_database(self):
-        """Initialize the database schema if it doesn't exist."""
-        with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-            # Create devices table
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS devices (
-                    device_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    device_name TEXT UNIQUE NOT NULL,
-                    device_type TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-            """)
-            
-            # Create metrics table
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS metrics (
-                    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    metric_name TEXT UNIQUE NOT NULL,
-                    metric_type TEXT NOT NULL,
-                    unit TEXT,
-                    created_at TEXT NOT NULL
-                )
-            """)
-            
-            # Create device_metrics table (for storing actual metric values)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS device_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    device_id INTEGER NOT NULL,
-                    metric_id INTEGER NOT NULL,
-                    value REAL NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (device_id) REFERENCES devices (device_id),
-                    FOREIGN KEY (metric_id) REFERENCES metrics (metric_id)
-                )
-            """)
-            
-            # Create indices for faster queries
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_device_metrics_device_id ON device_metrics(device_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_device_metrics_metric_id ON device_metrics(metric_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_device_metrics_timestamp ON device_metrics(timestamp)")
-            
-            # Insert default devices if they don't exist
-            self._insert_default_data(conn)
-            
-            # Commit changes
-            conn.commit()
+        """Bring the schema up to date, applying only the migrations it hasn't had yet."""
+        applied = migrate(self.pool)
+        if applied:
+            self.logger.info(f"Database schema migrated to version {applied[-1]}")
     
-    def _insert_default_data(self, conn):
-        """Insert default devices and metrics if they don't exist."""
-        # Default devices
-        devices = [
-            ("PC", "system"),
-            ("Stock API", "external")
-        ]
-        
-        for device_name, device_type in devices:
-            conn.execute("""
-                INSERT OR IGNORE INTO devices (device_name, device_type, created_at)
-                VALUES (?, ?, ?)
-            """, (device_name, device_type, datetime.now().isoformat()))
-        
-        # Default metrics for PC
-        system_metrics = [
-            ("CPU Usage", "percentage", "%"),
-            ("Memory Usage", "percentage", "%"),
-            ("Disk Usage", "percentage", "%"),
-            ("Running Processes", "count", "processes"),
-            ("Thread Count", "count", "threads")
-        ]
-        
-        for metric_name, metric_type, unit in system_metrics:
-            conn.execute("""
-                INSERT OR IGNORE INTO metrics (metric_name, metric_type, unit, created_at)
-                VALUES (?, ?, ?, ?)
-            """, (metric_name, metric_type, unit, datetime.now().isoformat()))
-        
-        # Default metrics for stocks
-        stock_metrics = [
-            ("Price", "currency", "USD"),
-            ("Volume", "count", "shares"),
-            ("Change", "currency", "USD"),
-            ("Change Percent", "percentage", "%"),
-            ("Market Cap", "currency", "USD")
-        ]
+    def preload_ids(self):
+        """Load every device and metric name -> id mapping into the ID cache."""
+        with self.pool.reader() as conn:
+            devices = conn.execute("SELECT device_name, device_id FROM devices").fetchall()
+            metrics = conn.execute("SELECT metric_name, metric_id FROM metrics").fetchall()
         
-        for metric_name, metric_type, unit in stock_metrics:
-            conn.execute("""
-                INSERT OR IGNORE INTO metrics (metric_name, metric_type, unit, created_at)
-                VALUES (?, ?, ?, ?)
-            """, (metric_name, metric_type, unit, datetime.now().isoformat()))
+        self.id_cache.load('device', devices)
+        self.id_cache.load('metric', metrics)
+    
+    def invalidate_id_cache(self, kind=None, name=None):
+        """
+        Drop cached name -> id mappings.
+        Kind can be 'device' or 'metric'; with no arguments the whole cache is cleared.
+        """
+        self.id_cache.invalidate(kind, name)
     
     def get_device_id(self, device_name):
         """Get device ID by name, creating it if it doesn't exist."""
-        with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
+        device_id = self.id_cache.get('device', device_name)
+        if device_id is not None:
+            return device_id
+        
+        with self.pool.reader() as conn:
             cursor = conn.execute("""
                 SELECT device_id FROM devices WHERE device_name = ?
             """, (device_name,))
             result = cursor.fetchone()
             
-            if result:
-                return result[0]
-            else:
-                # Create a new device entry
-                conn.execute("""
-                    INSERT INTO devices (device_name, device_type, created_at)
-                    VALUES (?, ?, ?)
-                """, (device_name, "unknown", datetime.now().isoformat()))
-                
-                # Get the new device_id
-                cursor = conn.execute("""
-                    SELECT device_id FROM devices WHERE device_name = ?
-                """, (device_name,))
-                return cursor.fetchone()[0]
+        if result:
+            self.id_cache.put('device', device_name, result[0])
+            return result[0]
+        
+        with self.pool.writer() as conn:
+            # Create a new device entry (another thread may have raced us to it)
+            conn.execute("""
+                INSERT OR IGNORE INTO devices (device_name, device_type, created_at)
+                VALUES (?, ?, ?)
+            """, (device_name, "unknown", datetime.now().isoformat()))
+            
+            # Get the new device_id
+            cursor = conn.execute("""
+                SELECT device_id FROM devices WHERE device_name = ?
+            """, (device_name,))
+            device_id = cursor.fetchone()[0]
+        
+        self.id_cache.put('device', device_name, device_id)
+        return device_id
     
     def get_metric_id(self, metric_name):
         """Get metric ID by name, creating it if it doesn't exist."""
-        with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
+        metric_id = self.id_cache.get('metric', metric_name)
+        if metric_id is not None:
+            return metric_id
+        
+        with self.pool.reader() as conn:
             cursor = conn.execute("""
                 SELECT metric_id FROM metrics WHERE metric_name = ?
             """, (metric_name,))
             result = cursor.fetchone()
             
-            if result:
-                return result[0]
+        if result:
+            self.id_cache.put('metric', metric_name, result[0])
+            return result[0]
+        
+        with self.pool.writer() as conn:
+            # Create a new metric entry (another thread may have raced us to it)
+            conn.execute("""
+                INSERT OR IGNORE INTO metrics (metric_name, metric_type, unit, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (metric_name, "unknown", "", datetime.now().isoformat()))
+            
+            # Get the new metric_id
+            cursor = conn.execute("""
+                SELECT metric_id FROM metrics WHERE metric_name = ?
+            """, (metric_name,))
+            metric_id = cursor.fetchone()[0]
+        
+        self.id_cache.put('metric', metric_name, metric_id)
+        return metric_id
+    
+    def get_device_ids(self, device_names):
+        """Get device IDs for several names at once, creating any that don't exist."""
+        return self._resolve_ids('device', device_names)
+    
+    def get_metric_ids(self, metric_names):
+        """Get metric IDs for several names at once, creating any that don't exist."""
+        return self._resolve_ids('metric', metric_names)
+    
+    def _resolve_ids(self, kind, names):
+        """Resolve names to ids through the ID cache, then one bulk SELECT and INSERT."""
+        table, id_column, name_column = ID_TABLES[kind]
+        ids = {}
+        missing = []
+        for name in set(names):
+            value = self.id_cache.get(kind, name)
+            if value is None:
+                missing.append(name)
             else:
-                # Create a new metric entry
-                conn.execute("""
-                    INSERT INTO metrics (metric_name, metric_type, unit, created_at)
-                    VALUES (?, ?, ?, ?)
-                """, (metric_name, "unknown", "", datetime.now().isoformat()))
+                ids[name] = value
+        
+        if not missing:
+            return ids
+        
+        with self.pool.reader() as conn:
+            found = self._select_ids(conn, table, id_column, name_column, missing)
+        
+        missing = [name for name in missing if name not in found]
+        if missing:
+            now = datetime.now().isoformat()
+            with self.pool.writer() as conn:
+                # Create the new entries (another thread may have raced us to some)
+                if kind == 'device':
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO devices (device_name, device_type, created_at)
+                        VALUES (?, ?, ?)
+                    """, [(name, "unknown", now) for name in missing])
+                else:
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO metrics (metric_name, metric_type, unit, created_at)
+                        VALUES (?, ?, ?, ?)
+                    """, [(name, "unknown", "", now) for name in missing])
                 
-                # Get the new metric_id
-                cursor = conn.execute("""
-                    SELECT metric_id FROM metrics WHERE metric_name = ?
-                """, (metric_name,))
-                return cursor.fetchone()[0]
+                found.update(self._select_ids(conn, table, id_column, name_column, missing))
+        
+        for name, value in found.items():
+            self.id_cache.put(kind, name, value)
+        ids.update(found)
+        return ids
+    
+    @staticmethod
+    def _select_ids(conn, table, id_column, name_column, names):
+        """Look up ids for names, chunked to stay under SQLite's parameter limit."""
+        found = {}
+        for i in range(0, len(names), MAX_QUERY_PARAMS):
+            chunk = names[i:i + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = conn.execute(f"""
+                SELECT {name_column}, {id_column} FROM {table}
+                WHERE {name_column} IN ({placeholders})
+            """, chunk)
+            found.update(cursor.fetchall())
+        return found
+    
+    def store_samples(self, samples):
+        """
+        Store (device_name, metric_name, value, timestamp) samples in bulk.
+        Timestamps may be datetimes, epoch seconds/milliseconds or ISO strings.
+        Device and metric IDs are resolved in bulk and all rows are written with a
+        single executemany inside one transaction. Returns the number of rows written.
+        """
+        samples = list(samples)
+        if not samples:
+            return 0
+        
+        device_ids = self.get_device_ids(sample[0] for sample in samples)
+        metric_ids = self.get_metric_ids(sample[1] for sample in samples)
+        
+        now = datetime.now()
+        rows = []
+        converted = {}
+        for device_name, metric_name, value, timestamp in samples:
+            timestamp = now if timestamp is None else timestamp
+            # Samples of one collection usually share a timestamp, so convert it once
+            pair = converted.get(timestamp)
+            if pair is None:
+                pair = converted[timestamp] = (to_timestamp_text(timestamp), to_epoch_ms(timestamp))
+            rows.append((device_ids[device_name], metric_ids[metric_name], value) + pair)
+        
+        with self.pool.writer() as conn:
+            conn.executemany("""
+                INSERT INTO device_metrics (device_id, metric_id, value, timestamp, ts)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            
+            # Keep the rollups in step within the same transaction
+            update_rollups(conn, [(row[0], row[1], row[2], row[4]) for row in rows])
+        
+        if self._write_listeners:
+            self._notify_write({(sample[0], sample[1]) for sample in samples})
+        return len(rows)
+    
+    def build_system_samples(self, metrics):
+        """Convert a system metrics dict into samples for store_samples."""
+        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        return [
+            ("PC", metric_name, metrics.get(key, 0), timestamp)
+            for key, metric_name in SYSTEM_METRIC_FIELDS
+        ]
+    
+    def build_stock_samples(self, metrics):
+        """Convert a stock metrics dict into samples for store_samples."""
+        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        return [
+            (f"Stock-{symbol}", metric_name, data.get(key, 0), timestamp)
+            for symbol, data in metrics.get('stocks', {}).items()
+            for key, metric_name in STOCK_METRIC_FIELDS
+        ]
+    
+    def build_disk_samples(self, metrics):
+        """Convert a disk metrics dict into samples, one device per mountpoint and per disk."""
+        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        samples = [
+            (f"Disk-{mountpoint}", metric_name, usage[key], timestamp)
+            for mountpoint, usage in metrics.get('mounts', {}).items()
+            for key, metric_name in DISK_USAGE_FIELDS
+        ]
+        samples += [
+            (f"DiskIO-{disk}", metric_name, rates[key], timestamp)
+            for disk, rates in metrics.get('io', {}).items()
+            for key, metric_name in DISK_IO_FIELDS
+            if rates.get(key) is not None
+        ]
+        return samples
+    
+    def build_network_samples(self, metrics):
+        """Convert a network metrics dict into samples, one device per interface."""
+        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        samples = [
+            (f"NIC-{interface}", metric_name, rates[key], timestamp)
+            for interface, rates in metrics.get('interfaces', {}).items()
+            for key, metric_name in NETWORK_IO_FIELDS
+        ]
+        # Connection counts are one metric per state ("Connections ESTABLISHED", ...)
+        samples += [
+            ("Network", f"Connections {state}", count, timestamp)
+            for state, count in (metrics.get('connections') or {}).items()
+        ]
+        return samples
+    
+    def build_process_samples(self, metrics):
+        """Convert a top-N process dict into samples, one device per rank slot (e.g. Process-Top-CPU-1)."""
+        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        return [
+            (f"{prefix}-{entry['rank']}", metric_name, entry[key], timestamp)
+            for ranking, prefix in PROCESS_RANKINGS
+            for entry in metrics.get(ranking, [])
+            for key, metric_name in PROCESS_FIELDS
+        ]
     
     def store_system_metrics(self, metrics):
         """Store system metrics in the database."""
         try:
-            device_id = self.get_device_id("PC")
             timestamp = metrics.get('timestamp', datetime.now().isoformat())
+            self.store_samples(self.build_system_samples(metrics))
             
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-                # Store CPU usage
-                cpu_metric_id = self.get_metric_id("CPU Usage")
-                conn.execute("""
-                    INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (device_id, cpu_metric_id, metrics.get('cpu_percent', 0), timestamp))
-                
-                # Store Memory usage
-                memory_metric_id = self.get_metric_id("Memory Usage")
-                conn.execute("""
-                    INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (device_id, memory_metric_id, metrics.get('memory_percent', 0), timestamp))
-                
-                # Store Disk usage if available
-                if 'disk_percent' in metrics:
-                    disk_metric_id = self.get_metric_id("Disk Usage")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, disk_metric_id, metrics.get('disk_percent', 0), timestamp))
-                
-                # Store Running Processes
-                processes_metric_id = self.get_metric_id("Running Processes")
-                conn.execute("""
-                    INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (device_id, processes_metric_id, metrics.get('running_processes', 0), timestamp))
-                
-                # Store Thread Count
-                threads_metric_id = self.get_metric_id("Thread Count")
-                conn.execute("""
-                    INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (device_id, threads_metric_id, metrics.get('thread_count', 0), timestamp))
-                
-                # Commit the transaction
-                conn.commit()
-                
             self.logger.info(f"Stored system metrics at {timestamp}")
             return True
         except Exception as e:
@@ -216,49 +382,7 @@ class Database:
         """Store stock metrics in the database."""
         try:
             timestamp = metrics.get('timestamp', datetime.now().isoformat())
-            
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-                for symbol, data in metrics.get('stocks', {}).items():
-                    # Get or create device for this stock symbol
-                    device_id = self.get_device_id(f"Stock-{symbol}")
-                    
-                    # Store Price
-                    price_metric_id = self.get_metric_id("Price")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, price_metric_id, data.get('price', 0), timestamp))
-                    
-                    # Store Volume
-                    volume_metric_id = self.get_metric_id("Volume")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, volume_metric_id, data.get('volume', 0), timestamp))
-                    
-                    # Store Change
-                    change_metric_id = self.get_metric_id("Change")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, change_metric_id, data.get('change', 0), timestamp))
-                    
-                    # Store Change Percent
-                    change_percent_metric_id = self.get_metric_id("Change Percent")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, change_percent_metric_id, data.get('change_percent', 0), timestamp))
-                    
-                    # Store Market Cap
-                    market_cap_metric_id = self.get_metric_id("Market Cap")
-                    conn.execute("""
-                        INSERT INTO device_metrics (device_id, metric_id, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (device_id, market_cap_metric_id, data.get('market_cap', 0), timestamp))
-                
-                # Commit the transaction
-                conn.commit()
+            self.store_samples(self.build_stock_samples(metrics))
             
             self.logger.info(f"Stored stock metrics at {timestamp}")
             return True
@@ -269,38 +393,7 @@ class Database:
     def get_system_metrics(self, limit=100):
         """Retrieve latest system metrics."""
         try:
-            device_id = self.get_device_id("PC")
-            
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-                # Get the latest timestamps
-                cursor = conn.execute("""
-                    SELECT DISTINCT timestamp 
-                    FROM device_metrics 
-                    WHERE device_id = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                """, (device_id, limit))
-                
-                timestamps = [row[0] for row in cursor.fetchall()]
-                
-                result = []
-                for timestamp in timestamps:
-                    # Get all metrics for this timestamp
-                    cursor = conn.execute("""
-                        SELECT m.metric_name, dm.value
-                        FROM device_metrics dm
-                        JOIN metrics m ON dm.metric_id = m.metric_id
-                        WHERE dm.device_id = ? AND dm.timestamp = ?
-                    """, (device_id, timestamp))
-                    
-                    metrics = {}
-                    for metric_name, value in cursor.fetchall():
-                        metrics[metric_name.lower().replace(' ', '_')] = value
-                    
-                    metrics['timestamp'] = timestamp
-                    result.append(metrics)
-                
-                return result
+            return self._get_latest_rows("PC", SYSTEM_METRIC_FIELDS, limit)
         except Exception as e:
             self.logger.error(f"Error retrieving system metrics: {str(e)}")
             return []
@@ -308,47 +401,58 @@ class Database:
     def get_stock_metrics(self, symbol, limit=100):
         """Retrieve latest stock metrics for a given symbol."""
         try:
-            device_id = self.get_device_id(f"Stock-{symbol}")
-            
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-                # Get the latest timestamps
-                cursor = conn.execute("""
-                    SELECT DISTINCT timestamp 
-                    FROM device_metrics 
-                    WHERE device_id = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                """, (device_id, limit))
-                
-                timestamps = [row[0] for row in cursor.fetchall()]
-                
-                result = []
-                for timestamp in timestamps:
-                    # Get all metrics for this timestamp
-                    cursor = conn.execute("""
-                        SELECT m.metric_name, dm.value
-                        FROM device_metrics dm
-                        JOIN metrics m ON dm.metric_id = m.metric_id
-                        WHERE dm.device_id = ? AND dm.timestamp = ?
-                    """, (device_id, timestamp))
-                    
-                    metrics = {}
-                    for metric_name, value in cursor.fetchall():
-                        metrics[metric_name.lower().replace(' ', '_')] = value
-                    
-                    metrics['timestamp'] = timestamp
-                    metrics['symbol'] = symbol
-                    result.append(metrics)
-                
-                return result
+            result = self._get_latest_rows(f"Stock-{symbol}", STOCK_METRIC_FIELDS, limit)
+            for metrics in result:
+                metrics['symbol'] = symbol
+            return result
         except Exception as e:
             self.logger.error(f"Error retrieving stock metrics: {str(e)}")
             return []
     
+    def _get_latest_rows(self, device_name, fields, limit):
+        """
+        Return the latest `limit` timestamps of a device as one dict per timestamp.
+        A single conditional-aggregation query pivots the metric rows into columns.
+        """
+        metric_names = [metric_name for _, metric_name in fields]
+        device_id = self.get_device_id(device_name)
+        metric_ids = self.get_metric_ids(metric_names)
+        
+        columns = ",\n".join(
+            "MAX(CASE WHEN metric_id = ? THEN value END)" for _ in metric_names
+        )
+        params = [metric_ids[name] for name in metric_names]
+        
+        with self.pool.reader() as conn:
+            cursor = conn.execute(f"""
+                SELECT MIN(timestamp),
+                       {columns}
+                FROM device_metrics
+                WHERE device_id = ? AND ts IN (
+                    SELECT DISTINCT ts
+                    FROM device_metrics
+                    WHERE device_id = ? AND ts IS NOT NULL
+                    ORDER BY ts DESC
+                    LIMIT ?
+                )
+                GROUP BY ts
+                ORDER BY ts DESC
+            """, params + [device_id, device_id, limit])
+            rows = cursor.fetchall()
+        
+        keys = [name.lower().replace(' ', '_') for name in metric_names]
+        result = []
+        for row in rows:
+            # Metrics that weren't recorded at this timestamp are left out
+            metrics = {key: value for key, value in zip(keys, row[1:]) if value is not None}
+            metrics['timestamp'] = row[0]
+            result.append(metrics)
+        return result
+    
     def get_available_stock_symbols(self):
         """Get a list of all stock symbols in the database."""
         try:
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
+            with self.pool.reader() as conn:
                 cursor = conn.execute("""
                     SELECT device_name FROM devices
                     WHERE device_name LIKE 'Stock-%'
@@ -362,82 +466,106 @@ class Database:
             return []
     
     def get_metrics_by_timerange(self, device_name, metric_name, start_time=None, end_time=None, limit=None):
-        """Retrieve metrics within a specific time range."""
-        if not start_time:
-            # Default to last 24 hours
-            start_time = (datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")
-        if not end_time:
-            end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
+        """
+        Retrieve metrics within a specific time range.
+        start_time and end_time may be datetimes, epoch seconds/milliseconds or strings.
+        """
         try:
+            start_ms, end_ms = self._time_range(start_time, end_time, timedelta(hours=24))
             device_id = self.get_device_id(device_name)
             metric_id = self.get_metric_id(metric_name)
             
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
+            with self.pool.reader() as conn:
                 if limit:
                     cursor = conn.execute("""
                         SELECT timestamp, value
                         FROM device_metrics
-                        WHERE device_id = ? AND metric_id = ? AND timestamp BETWEEN ? AND ?
-                        ORDER BY timestamp ASC
+                        WHERE device_id = ? AND metric_id = ? AND ts BETWEEN ? AND ?
+                        ORDER BY ts ASC
                         LIMIT ?
-                    """, (device_id, metric_id, start_time, end_time, limit))
+                    """, (device_id, metric_id, start_ms, end_ms, limit))
                 else:
                     cursor = conn.execute("""
                         SELECT timestamp, value
                         FROM device_metrics
-                        WHERE device_id = ? AND metric_id = ? AND timestamp BETWEEN ? AND ?
-                        ORDER BY timestamp ASC
-                    """, (device_id, metric_id, start_time, end_time))
+                        WHERE device_id = ? AND metric_id = ? AND ts BETWEEN ? AND ?
+                        ORDER BY ts ASC
+                    """, (device_id, metric_id, start_ms, end_ms))
                 
                 return cursor.fetchall()
         except Exception as e:
             self.logger.error(f"Error retrieving metrics by timerange: {str(e)}")
             return []
     
-    def get_metrics_aggregated(self, device_name, metric_name, interval='hour', start_time=None, end_time=None):
+    def get_latest_values(self, device_names, metric_name):
         """
-        Retrieve aggregated metrics (avg, min, max) grouped by time interval.
-        Interval can be 'hour', 'day', or 'week'.
+        Get the most recent value of one metric for many devices with a single query.
+        Returns {device_name: value}; devices without any sample are left out.
         """
-        if not start_time:
-            # Default to last 7 days
-            start_time = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
-        if not end_time:
-            end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            device_names = list(device_names)
+            metric_id = self.get_metric_id(metric_name)
+            latest = {}
+            
+            with self.pool.reader() as conn:
+                for i in range(0, len(device_names), MAX_QUERY_PARAMS):
+                    chunk = device_names[i:i + MAX_QUERY_PARAMS]
+                    placeholders = ", ".join("?" * len(chunk))
+                    # One index seek per device on (device_id, metric_id, ts)
+                    cursor = conn.execute(f"""
+                        SELECT d.device_name, (
+                            SELECT dm.value
+                            FROM device_metrics dm
+                            WHERE dm.device_id = d.device_id AND dm.metric_id = ? AND dm.ts IS NOT NULL
+                            ORDER BY dm.ts DESC
+                            LIMIT 1
+                        )
+                        FROM devices d
+                        WHERE d.device_name IN ({placeholders})
+                    """, [metric_id] + chunk)
+                    latest.update((name, value) for name, value in cursor.fetchall() if value is not None)
+            
+            return latest
+        except Exception as e:
+            self.logger.error(f"Error retrieving latest values: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def _time_range(start_time, end_time, default_span):
+        """Convert a query time range to epoch ms, defaulting to the last default_span."""
+        now = datetime.now()
+        start_ms = to_epoch_ms(now - default_span if start_time in (None, '') else start_time)
+        end_ms = to_epoch_ms(now if end_time in (None, '') else end_time)
+        return start_ms, end_ms
+    
+    def get_metrics_aggregated(self, device_name, metric_name, interval='hour', start_time=None, end_time=None):
+        """
+        Retrieve aggregated metrics grouped by time bucket.
+        Interval can be '1m', '5m', '1h', '1d', '1w' (or 'hour', 'day', 'week').
+        Each row is (time_bucket, avg, min, max, count, sum, last); buckets are
+        computed inside SQLite with integer arithmetic on the ts column.
         
-        # Define the time format based on the interval
-        if interval == 'hour':
-            time_format = "%Y-%m-%d %H:00:00"
-        elif interval == 'day':
-            time_format = "%Y-%m-%d 00:00:00"
-        elif interval == 'week':
-            time_format = "%Y-%W" # Year and week number
-        else:
-            time_format = "%Y-%m-%d %H:00:00"  # Default to hourly
+        The coarsest rollup table whose buckets tile the interval is read instead of
+        raw samples; the range edges are then widened to whole rollup buckets.
+        """
+        width = parse_interval(interval)
         
         try:
+            start_ms, end_ms = self._time_range(start_time, end_time, timedelta(days=7))
             device_id = self.get_device_id(device_name)
             metric_id = self.get_metric_id(metric_name)
             
-            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
-                # Enable strftime function
-                conn.create_function("strftime", 2, lambda fmt, timestamp: datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime(fmt))
-                
-                cursor = conn.execute(f"""
-                    SELECT 
-                        strftime(?, timestamp) as time_bucket,
-                        AVG(value) as avg_value,
-                        MIN(value) as min_value,
-                        MAX(value) as max_value,
-                        COUNT(*) as count
-                    FROM device_metrics 
-                    WHERE device_id = ? AND metric_id = ? AND timestamp BETWEEN ? AND ?
-                    GROUP BY time_bucket
-                    ORDER BY time_bucket ASC
-                """, (time_format, device_id, metric_id, start_time, end_time))
-                
+            rollup = choose_rollup(width)
+            if rollup:
+                table, rollup_width = rollup
+                start_ms = bucket_start(start_ms, rollup_width)
+                query = aggregate_query(width, table)
+            else:
+                query = aggregate_query(width)
+            
+            with self.pool.reader() as conn:
+                cursor = conn.execute(query, (device_id, metric_id, start_ms, end_ms))
                 return cursor.fetchall()
         except Exception as e:
             self.logger.error(f"Error retrieving aggregated metrics: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
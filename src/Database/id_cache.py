@@ -0,0 +1,54 @@
+import threading
+
+
+class IdCache:
+    """
+    Thread-safe write-through cache of device and metric name -> id mappings.
+    Entries are added when names are loaded or created and are only dropped
+    through invalidate().
+    """
+
+    KINDS = ('device', 'metric')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {kind: {} for kind in self.KINDS}
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(self, kind, name):
+        """Return the cached id for name, or None if it is not cached."""
+        with self._lock:
+            value = self._ids[kind].get(name)
+            if value is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['hits'] += 1
+            return value
+
+    def put(self, kind, name, value):
+        """Cache a single name -> id mapping."""
+        with self._lock:
+            self._ids[kind][name] = value
+
+    def load(self, kind, mapping):
+        """Bulk-load name -> id mappings, replacing the current ones for kind."""
+        with self._lock:
+            self._ids[kind] = dict(mapping)
+
+    def invalidate(self, kind=None, name=None):
+        """Drop one name, every name of a kind, or the whole cache."""
+        with self._lock:
+            kinds = [kind] if kind else self.KINDS
+            for k in kinds:
+                if name is None:
+                    self._ids[k].clear()
+                else:
+                    self._ids[k].pop(name, None)
+
+    def stats(self):
+        """Return cache counters and sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            for kind in self.KINDS:
+                stats[f'{kind}s'] = len(self._ids[kind])
+        return stats
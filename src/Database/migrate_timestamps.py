@@ -0,0 +1,115 @@
+import sys
+import threading
+import time
+import logging
+from .database import Database
+from .timeutil import to_epoch_ms
+from .rollups import update_rollups
+
+
+class TimestampMigrator:
+    """
+    Online conversion of TEXT timestamps to the epoch-milliseconds ts column.
+    Rows are converted in small id-range chunks, each in its own short write
+    transaction, with a pause between chunks so live writers are never held
+    off for long. The TEXT values are local wall-clock time and are
+    converted in Python by timeutil.to_epoch_ms, the same as new writes.
+    """
+
+    def __init__(self, database, batch_size=5000, pause=0.05):
+        self.db = database
+        self.batch_size = batch_size
+        self.pause = pause
+        self.logger = logging.getLogger(__name__)
+        self._thread = None
+        self.stats = {
+            'rows_converted': 0,
+            'unparseable': 0,
+            'chunks': 0,
+            'seconds': 0.0,
+            'finished': False,
+        }
+
+    def pending(self):
+        """Return True if any row still has no epoch timestamp."""
+        with self.db.pool.reader() as conn:
+            row = conn.execute("SELECT 1 FROM device_metrics WHERE ts IS NULL LIMIT 1").fetchone()
+        return row is not None
+
+    def run(self):
+        """Convert every unconverted row, chunk by chunk. Returns the stats dict."""
+        started = time.perf_counter()
+        with self.db.pool.reader() as conn:
+            first_id, last_id = conn.execute(
+                "SELECT MIN(id), MAX(id) FROM device_metrics WHERE ts IS NULL"
+            ).fetchone()
+
+        # Rows written after this point always carry ts, so last_id is a fixed target
+        if first_id is not None:
+            low = first_id - 1
+            while low < last_id:
+                high = min(low + self.batch_size, last_id)
+                self._convert_chunk(low, high)
+                low = high
+                if self.pause:
+                    time.sleep(self.pause)
+
+        self.stats['seconds'] += time.perf_counter() - started
+        self.stats['finished'] = True
+        self.logger.info(
+            f"Converted {self.stats['rows_converted']} timestamps in {self.stats['chunks']} chunks "
+            f"({self.stats['unparseable']} unparseable) in {self.stats['seconds']:.1f}s"
+        )
+        return self.stats
+
+    def _convert_chunk(self, low, high):
+        """Convert rows with low < id <= high inside one write transaction."""
+        with self.db.pool.writer() as conn:
+            rows = conn.execute("""
+                SELECT id, device_id, metric_id, value, timestamp
+                FROM device_metrics
+                WHERE id > ? AND id <= ? AND ts IS NULL
+            """, (low, high)).fetchall()
+
+            updates = []
+            converted = []
+            parsed = {}
+            for row_id, device_id, metric_id, value, timestamp in rows:
+                try:
+                    if timestamp not in parsed:
+                        parsed[timestamp] = to_epoch_ms(timestamp)
+                except (TypeError, ValueError):
+                    # Unparseable rows stay NULL and are invisible to time-range queries
+                    self.stats['unparseable'] += 1
+                    continue
+                updates.append((parsed[timestamp], row_id))
+                converted.append((device_id, metric_id, value, parsed[timestamp]))
+
+            if updates:
+                conn.executemany("UPDATE device_metrics SET ts = ? WHERE id = ?", updates)
+                # These rows were never rolled up, since they had no ts until now
+                update_rollups(conn, converted)
+
+        self.stats['rows_converted'] += len(updates)
+        self.stats['chunks'] += 1
+
+    def start(self):
+        """Run the conversion on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="timestamp-migration", daemon=True)
+            self._thread.start()
+        return self._thread
+
+
+if __name__ == "__main__":
+    # Use command line argument for database path if provided
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "monitoring.db"
+    db = Database(db_path)
+    migrator = TimestampMigrator(db)
+    if migrator.pending():
+        stats = migrator.run()
+        print(f"Converted {stats['rows_converted']} rows in {stats['chunks']} chunks "
+              f"({stats['unparseable']} unparseable) in {stats['seconds']:.1f}s")
+    else:
+        print("All timestamps are already converted")
+    db.close()
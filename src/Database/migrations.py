@@ -0,0 +1,233 @@
+import logging
+from datetime import datetime
+from .rollups import create_rollup_tables, update_rollups
+
+logger = logging.getLogger(__name__)
+
+# Applied migrations, one row per version; PRAGMA user_version mirrors the latest
+CREATE_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+"""
+
+INSERT_METRIC_SQL = """
+    INSERT OR IGNORE INTO metrics (metric_name, metric_type, unit, created_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Rows folded per statement when backfilling rollups
+BACKFILL_BATCH_SIZE = 10000
+
+
+# Every migration is written to be safe on a database that already has its
+# changes: databases created before migrations existed start at version 0 and
+# run them all once.
+
+def _create_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS devices (
+            device_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_name TEXT UNIQUE NOT NULL,
+            device_type TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            metric_name TEXT UNIQUE NOT NULL,
+            metric_type TEXT NOT NULL,
+            unit TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    # Actual metric values; ts is the epoch-milliseconds time every query
+    # filters and buckets on. ts is true UTC; timestamp is the same instant as
+    # naive local wall-clock text, and naive inputs are read as local time
+    # (Database.timeutil converts both ways, in Python)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS device_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_id INTEGER NOT NULL,
+            metric_id INTEGER NOT NULL,
+            value REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            ts INTEGER,
+            FOREIGN KEY (device_id) REFERENCES devices (device_id),
+            FOREIGN KEY (metric_id) REFERENCES metrics (metric_id)
+        )
+    """)
+
+
+def _add_ts_column(conn):
+    # Databases created before ts existed get the column added; their rows
+    # are converted by Database.migrate_timestamps
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(device_metrics)")]
+    if 'ts' not in columns:
+        conn.execute("ALTER TABLE device_metrics ADD COLUMN ts INTEGER")
+
+
+def _create_device_metrics_indexes(conn):
+    # Every read filters on device + metric (+ time range), and including value
+    # makes the composite index covering so those reads never touch the table
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_device_metrics_series
+        ON device_metrics(device_id, metric_id, ts, value)
+    """)
+
+    # Latest-N-snapshot reads walk a device's timestamps across all metrics;
+    # covering as well so the planner never prefers the series index for them
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_device_metrics_device_ts
+        ON device_metrics(device_id, ts, metric_id, value)
+    """)
+
+    # Time-only range work (and finding unconverted rows, whose ts is NULL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_device_metrics_ts ON device_metrics(ts)")
+
+    # Superseded: single-column indexes (device_id is a prefix of the composite
+    # ones, nothing filters on metric_id alone) and the TEXT timestamp indexes
+    for index in ('idx_device_metrics_device_id', 'idx_device_metrics_metric_id',
+                  'idx_device_metrics_timestamp', 'idx_device_metrics_lookup',
+                  'idx_device_metrics_device_time'):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+def _create_rollups(conn):
+    # Rollups added to a database that already has samples start from its history
+    if not create_rollup_tables(conn):
+        return
+    last_id = conn.execute("SELECT MAX(id) FROM device_metrics").fetchone()[0] or 0
+    for low in range(0, last_id, BACKFILL_BATCH_SIZE):
+        rows = conn.execute("""
+            SELECT device_id, metric_id, value, ts
+            FROM device_metrics
+            WHERE id > ? AND id <= ? AND ts IS NOT NULL
+        """, (low, low + BACKFILL_BATCH_SIZE)).fetchall()
+        update_rollups(conn, rows)
+
+
+def _insert_metrics(conn, metrics):
+    created_at = datetime.now().isoformat()
+    conn.executemany(INSERT_METRIC_SQL, [
+        (metric_name, metric_type, unit, created_at) for metric_name, metric_type, unit in metrics
+    ])
+
+
+def _seed_system_and_stocks(conn):
+    created_at = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT OR IGNORE INTO devices (device_name, device_type, created_at)
+        VALUES (?, ?, ?)
+    """, [
+        ("PC", "system", created_at),
+        ("Stock API", "external", created_at)
+    ])
+
+    _insert_metrics(conn, [
+        ("CPU Usage", "percentage", "%"),
+        ("Memory Usage", "percentage", "%"),
+        ("Disk Usage", "percentage", "%"),
+        ("Running Processes", "count", "processes"),
+        ("Thread Count", "count", "threads"),
+        ("Price", "currency", "USD"),
+        ("Volume", "count", "shares"),
+        ("Change", "currency", "USD"),
+        ("Change Percent", "percentage", "%"),
+        ("Market Cap", "currency", "USD")
+    ])
+
+
+def _seed_disk_metrics(conn):
+    # Usage per mountpoint, I/O per block device
+    _insert_metrics(conn, [
+        ("Disk Used", "bytes", "B"),
+        ("Disk Free", "bytes", "B"),
+        ("Disk Read Rate", "rate", "B/s"),
+        ("Disk Write Rate", "rate", "B/s"),
+        ("Disk Read IOPS", "rate", "ops/s"),
+        ("Disk Write IOPS", "rate", "ops/s"),
+        ("Disk Await", "duration", "ms"),
+        ("Disk Busy", "percentage", "%")
+    ])
+
+
+def _seed_network_metrics(conn):
+    _insert_metrics(conn, [
+        ("Network Sent Rate", "rate", "B/s"),
+        ("Network Received Rate", "rate", "B/s"),
+        ("Network Packets Sent", "rate", "packets/s"),
+        ("Network Packets Received", "rate", "packets/s"),
+        ("Network Errors In", "rate", "errors/s"),
+        ("Network Errors Out", "rate", "errors/s"),
+        ("Network Drops In", "rate", "packets/s"),
+        ("Network Drops Out", "rate", "packets/s"),
+        ("Connections total", "count", "connections")
+    ])
+
+
+def _seed_process_metrics(conn):
+    # The top-N process slots
+    _insert_metrics(conn, [
+        ("Process CPU", "percentage", "%"),
+        ("Process RSS", "bytes", "B"),
+        ("Process PID", "id", "pid")
+    ])
+
+
+# (version, description, apply(conn)) in order. Add new schema changes at the
+# end with the next number; never renumber or edit one that has shipped.
+MIGRATIONS = (
+    (1, "Create devices, metrics and device_metrics tables", _create_tables),
+    (2, "Add the epoch-milliseconds ts column to device_metrics", _add_ts_column),
+    (3, "Covering indexes on device_metrics", _create_device_metrics_indexes),
+    (4, "Create minute/hour/day rollup tables", _create_rollups),
+    (5, "Seed default devices and system and stock metrics", _seed_system_and_stocks),
+    (6, "Seed disk metrics", _seed_disk_metrics),
+    (7, "Seed network metrics", _seed_network_metrics),
+    (8, "Seed process metrics", _seed_process_metrics),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    """Return the schema version recorded in the database header (0 if never migrated)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(pool, migrations=MIGRATIONS):
+    """
+    Apply pending migrations in order, each in its own write transaction along
+    with its schema_version row and the new PRAGMA user_version. An up-to-date
+    database costs a single PRAGMA read. Returns the versions applied.
+    """
+    latest = migrations[-1][0]
+    with pool.maintenance() as conn:
+        current = schema_version(conn)
+    if current >= latest:
+        if current > latest:
+            logger.warning(f"Database schema version {current} is newer than this code ({latest})")
+        return []
+
+    applied = []
+    for version, description, apply in migrations:
+        with pool.writer() as conn:
+            # Another process may have applied it since the version was read
+            if schema_version(conn) >= version:
+                continue
+            conn.execute(CREATE_SCHEMA_VERSION_SQL)
+            apply(conn)
+            conn.execute("""
+                INSERT OR REPLACE INTO schema_version (version, description, applied_at)
+                VALUES (?, ?, ?)
+            """, (version, description, datetime.now().isoformat()))
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+        logger.info(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+    return applied
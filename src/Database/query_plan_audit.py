@@ -0,0 +1,137 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from .database import Database
+from .rollups import ROLLUP_TABLES
+from .retention import RetentionManager
+
+# Tables that grow with every sample and must never be scanned in full
+LARGE_TABLES = {'device_metrics'} | {table for table, _ in ROLLUP_TABLES}
+
+# Statements that have no query plan worth auditing
+SKIPPED_PREFIXES = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'CREATE', 'DROP', 'ALTER', 'ANALYZE', 'VACUUM')
+
+TABLE_ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def seed_test_data(db, hours=48):
+    """Write a small amount of system and stock history so every query has data."""
+    now = datetime.now().replace(microsecond=0)
+    samples = []
+    for i in range(hours * 6):
+        timestamp = (now - timedelta(minutes=10 * i)).isoformat()
+        samples += db.build_system_samples({
+            'timestamp': timestamp,
+            'cpu_percent': 10 + i % 50,
+            'memory_percent': 20 + i % 40,
+            'disk_percent': 50,
+            'running_processes': 200 + i % 10,
+            'thread_count': 1500 + i % 100
+        })
+        samples += db.build_stock_samples({
+            'timestamp': timestamp,
+            'stocks': {'AAPL': {'price': 150 + i % 5, 'volume': 1000000}}
+        })
+    db.store_samples(samples)
+
+
+def exercise_database(db):
+    """Call every read path of Database once so its statements can be traced."""
+    db.get_system_metrics(100)
+    db.get_stock_metrics('AAPL', 100)
+    db.get_available_stock_symbols()
+    db.get_metrics_by_timerange('PC', 'CPU Usage')
+    db.get_metrics_by_timerange('Stock-AAPL', 'Price', limit=1)
+    db.get_latest_values(['Stock-AAPL', 'Stock-GOOGL', 'Stock-MSFT'], 'Price')
+    # 30s is finer than any rollup, so it reads raw samples
+    for interval in ('30s', '1m', '5m', '1h', '1d', '1w'):
+        db.get_metrics_aggregated('PC', 'CPU Usage', interval)
+
+    # Retention deletes (long enough limits that the seeded history survives)
+    rollup_days = {table: 3650 for table, _ in ROLLUP_TABLES}
+    RetentionManager(db, raw_days=3650, rollup_days=rollup_days).run_once()
+
+
+def normalize_statement(sql):
+    """Collapse whitespace and replace literals so repeated statements group together."""
+    return LITERAL_PATTERN.sub('?', ' '.join(sql.split()))
+
+
+def find_full_scans(sql, plan):
+    """Return the plan lines of sql that scan a large table without a search key."""
+    aliases = {}
+    for table, alias in TABLE_ALIAS_PATTERN.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.upper() not in ('WHERE', 'ON', 'JOIN', 'GROUP', 'ORDER', 'LIMIT', 'VALUES', 'SET'):
+            aliases[alias.lower()] = table.lower()
+
+    problems = []
+    for row in plan:
+        detail = row[3]
+        match = SCAN_PATTERN.match(detail)
+        if match and aliases.get(match.group(1).lower()) in LARGE_TABLES:
+            problems.append(detail)
+    return problems
+
+
+def audit_query_plans(db_path=None):
+    """
+    Run EXPLAIN QUERY PLAN for every statement Database issues.
+    Returns (normalized_sql, problems) per distinct statement, where problems lists
+    the plan lines that fully scan a large table.
+    If db_path is given, a copy of that database is audited instead of a seeded one.
+    """
+    workdir = tempfile.mkdtemp()
+    audit_path = os.path.join(workdir, 'audit.db')
+    try:
+        if db_path:
+            shutil.copy(db_path, audit_path)
+        db = Database(audit_path)
+        if not db_path:
+            seed_test_data(db)
+
+        statements = []
+        with db.pool.reader() as reader, db.pool.writer() as writer:
+            reader.set_trace_callback(statements.append)
+            writer.set_trace_callback(statements.append)
+        exercise_database(db)
+
+        # Explain the first concrete instance of each distinct statement
+        unique = {}
+        for sql in statements:
+            sql = sql.strip()
+            if not sql.upper().startswith(SKIPPED_PREFIXES):
+                unique.setdefault(normalize_statement(sql), sql)
+
+        results = []
+        with db.pool.reader() as conn:
+            conn.set_trace_callback(None)
+            for normalized, sql in unique.items():
+                plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+                results.append((normalized, find_full_scans(sql, plan)))
+        db.close()
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Use command line argument for database path if provided
+    db_path = sys.argv[1] if len(sys.argv) > 1 else None
+    results = audit_query_plans(db_path)
+
+    failures = 0
+    for sql, problems in results:
+        status = "FULL SCAN" if problems else "ok"
+        print(f"[{status}] {sql}")
+        for problem in problems:
+            print(f"    {problem}")
+        failures += bool(problems)
+
+    print(f"\n{len(results)} statements audited, {failures} with full scans")
+    sys.exit(1 if failures else 0)
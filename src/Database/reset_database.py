@@ -64,7 +64,7 @@ def add_test_data(db):
     # Add system metrics
     for i in range(10):
         hours_ago = 10 - i
-        timestamp = f"2023-03-{4 - (hours_ago // 24)} {hours_ago % 24}:00:00"
+        timestamp = f"2023-03-{4 - (hours_ago // 24):02d} {hours_ago % 24:02d}:00:00"
         
         try:
             db.store_system_metrics({
@@ -87,7 +87,7 @@ def add_test_data(db):
     
     for i in range(10):
         hours_ago = 10 - i
-        timestamp = f"2023-03-{4 - (hours_ago // 24)} {hours_ago % 24}:00:00"
+        timestamp = f"2023-03-{4 - (hours_ago // 24):02d} {hours_ago % 24:02d}:00:00"
         
         stock_data = {}
         for symbol in stocks:
@@ -0,0 +1,210 @@
+import sys
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from .rollups import ROLLUP_TABLES
+from .timeutil import to_epoch_ms
+from .database import Database
+
+# auto_vacuum mode value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionManager:
+    """
+    Background retention and downsampling policy for the metrics database.
+    Raw samples are kept for raw_days and each rollup table for its own number
+    of days (None keeps it forever), so older history survives only in
+    progressively coarser rollups. Expired rows are deleted in small batches,
+    one short write transaction each, and freed pages are returned to the file
+    system with incremental vacuum.
+
+    Databases created before incremental auto-vacuum was enabled need a
+    one-off full VACUUM to switch over (convert_auto_vacuum(), or running this
+    module). Until then, retention still purges rows but doesn't vacuum.
+    """
+
+    def __init__(self, database, raw_days=7, rollup_days=None, batch_size=5000,
+                 pause=0.05, interval=3600, vacuum_pages=1000):
+        self.db = database
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days if rollup_days is not None else {}
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.logger = logging.getLogger(__name__)
+
+        self._warned_auto_vacuum = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'rows_purged': {},
+            'total_rows_purged': 0,
+            'pages_vacuumed': 0,
+            'last_run_at': None,
+            'last_run_seconds': 0.0,
+            'total_seconds': 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, database, config):
+        """Build a manager from the database.retention config section."""
+        return cls(
+            database,
+            raw_days=config.get('raw_days', 7),
+            rollup_days={table: config.get(f'{table}_days') for table, _ in ROLLUP_TABLES},
+            batch_size=config.get('batch_size', 5000),
+            pause=config.get('pause', 0.05),
+            interval=config.get('interval', 3600),
+            vacuum_pages=config.get('vacuum_pages', 1000)
+        )
+
+    def policies(self):
+        """Return (table, time column, retention days) for every table with a limit."""
+        policies = [('device_metrics', 'ts', self.raw_days)]
+        for table, _ in ROLLUP_TABLES:
+            policies.append((table, 'bucket', self.rollup_days.get(table)))
+        return [policy for policy in policies if policy[2] is not None]
+
+    def run_once(self):
+        """Apply every retention policy, then vacuum. Returns rows purged per table."""
+        started = time.perf_counter()
+        now = datetime.now()
+        purged = {}
+
+        for table, column, days in self.policies():
+            cutoff = to_epoch_ms(now - timedelta(days=days))
+            purged[table] = self._purge(table, column, cutoff)
+            if self._stop.is_set():
+                break
+
+        pages = self._vacuum()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._stats['runs'] += 1
+            for table, count in purged.items():
+                self._stats['rows_purged'][table] = self._stats['rows_purged'].get(table, 0) + count
+                self._stats['total_rows_purged'] += count
+            self._stats['pages_vacuumed'] += pages
+            self._stats['last_run_at'] = now.isoformat()
+            self._stats['last_run_seconds'] = elapsed
+            self._stats['total_seconds'] += elapsed
+
+        self.logger.info(f"Retention purged {sum(purged.values())} rows and vacuumed {pages} pages in {elapsed:.2f}s")
+        return purged
+
+    def _purge(self, table, column, cutoff):
+        """Delete rows older than cutoff in batches. Returns the number deleted."""
+        # Raw rows are deleted by rowid; rollup tables are WITHOUT ROWID, so by key
+        if table == 'device_metrics':
+            sql = f"""
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE {column} < ? LIMIT ?
+                )
+            """
+        else:
+            sql = f"""
+                DELETE FROM {table} WHERE (device_id, metric_id, bucket) IN (
+                    SELECT device_id, metric_id, bucket FROM {table} WHERE {column} < ? LIMIT ?
+                )
+            """
+
+        total = 0
+        while not self._stop.is_set():
+            with self.db.pool.writer() as conn:
+                deleted = conn.execute(sql, (cutoff, self.batch_size)).rowcount
+            total += deleted
+            if deleted < self.batch_size:
+                break
+            # Let queued writers in between batches
+            if self.pause:
+                time.sleep(self.pause)
+        return total
+
+    def _vacuum(self):
+        """Return free pages to the file system. Returns the number of pages freed."""
+        with self.db.pool.maintenance() as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode != AUTO_VACUUM_INCREMENTAL:
+                # Converting takes a full VACUUM under the writer lock, stalling
+                # ingest for the whole rebuild, so it is never done in the background
+                if not self._warned_auto_vacuum:
+                    self.logger.warning("Database isn't in incremental auto-vacuum mode; freed pages "
+                                        "won't be returned until it is converted with "
+                                        "`python -m Database.retention` while the app is stopped")
+                    self._warned_auto_vacuum = True
+                return 0
+
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                return 0
+            pages = min(free, self.vacuum_pages) if self.vacuum_pages else free
+            # incremental_vacuum frees one page per step and returns no rows, so
+            # execute() would stop after the first page; executescript() runs it out
+            conn.executescript(f"PRAGMA incremental_vacuum({pages})")
+            return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def convert_auto_vacuum(self):
+        """
+        Switch an existing database to incremental auto-vacuum with a full VACUUM.
+        This rewrites the whole file while holding the writer lock, so run it as
+        a maintenance step, not while collectors are writing. Returns the number
+        of pages freed, or None if the database was already converted.
+        """
+        with self.db.pool.maintenance() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+                return None
+            self.logger.info("Converting database to incremental auto-vacuum")
+            before = conn.execute("PRAGMA page_count").fetchone()[0]
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return max(before - conn.execute("PRAGMA page_count").fetchone()[0], 0)
+
+    def stats(self):
+        """Return purge counters and timings."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['rows_purged'] = dict(self._stats['rows_purged'])
+        return stats
+
+    def start(self):
+        """Run retention every `interval` seconds on a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        """Stop the background thread, interrupting a purge between batches."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Error applying retention policy: {str(e)}")
+            self._stop.wait(self.interval)
+
+
+if __name__ == "__main__":
+    # One-off conversion to incremental auto-vacuum; stop the app first.
+    # Use command line argument for database path if provided
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "monitoring.db"
+    db = Database(db_path)
+    started = time.perf_counter()
+    pages = RetentionManager(db).convert_auto_vacuum()
+    if pages is None:
+        print("Database already uses incremental auto-vacuum")
+    else:
+        print(f"Converted to incremental auto-vacuum, freeing {pages} pages in {time.perf_counter() - started:.1f}s")
+    db.close()
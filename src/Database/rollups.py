@@ -0,0 +1,107 @@
+from .aggregation import bucket_start, is_calendar_width
+
+# Pre-aggregated rollup tables from finest to coarsest, with their bucket width in
+# seconds. Each holds the count, sum, min, max and latest value of the raw samples
+# per device, metric and bucket, and is updated as samples are written.
+ROLLUP_TABLES = (
+    ('rollup_1m', 60),
+    ('rollup_1h', 60 * 60),
+    ('rollup_1d', 24 * 60 * 60),
+)
+
+CREATE_ROLLUP_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        device_id INTEGER NOT NULL,
+        metric_id INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        value_count INTEGER NOT NULL,
+        value_sum REAL NOT NULL,
+        value_min REAL NOT NULL,
+        value_max REAL NOT NULL,
+        last_ts INTEGER NOT NULL,
+        last_value REAL NOT NULL,
+        PRIMARY KEY (device_id, metric_id, bucket)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO {table} (device_id, metric_id, bucket, value_count, value_sum,
+                         value_min, value_max, last_ts, last_value)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (device_id, metric_id, bucket) DO UPDATE SET
+        value_count = value_count + excluded.value_count,
+        value_sum = value_sum + excluded.value_sum,
+        value_min = MIN(value_min, excluded.value_min),
+        value_max = MAX(value_max, excluded.value_max),
+        last_value = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_value ELSE last_value END,
+        last_ts = MAX(last_ts, excluded.last_ts)
+"""
+
+
+def create_rollup_tables(conn):
+    """Create any missing rollup tables. Returns the names of the ones created."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    created = []
+    for table, _ in ROLLUP_TABLES:
+        if table not in existing:
+            conn.execute(CREATE_ROLLUP_SQL.format(table=table))
+            created.append(table)
+        # Retention purges expired buckets across every device and metric
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket)")
+    return created
+
+
+def fold_samples(rows, width):
+    """
+    Pre-aggregate (device_id, metric_id, value, ts) rows into rollup rows for
+    buckets of `width` seconds, so each bucket costs a single upsert. Buckets
+    are aligned like aggregation.bucket_expression: day buckets start at
+    local midnight.
+    """
+    width_ms = width * 1000
+    calendar = is_calendar_width(width)
+    starts = {}  # minute -> bucket start, so calendar buckets cost one conversion per minute
+    buckets = {}
+    for device_id, metric_id, value, ts in rows:
+        if calendar:
+            minute = ts // 60000
+            start = starts.get(minute)
+            if start is None:
+                start = starts[minute] = bucket_start(ts, width)
+        else:
+            start = ts - ts % width_ms
+        key = (device_id, metric_id, start)
+        entry = buckets.get(key)
+        if entry is None:
+            buckets[key] = [1, value, value, value, ts, value]
+            continue
+        entry[0] += 1
+        entry[1] += value
+        if value < entry[2]:
+            entry[2] = value
+        if value > entry[3]:
+            entry[3] = value
+        if ts >= entry[4]:
+            entry[4] = ts
+            entry[5] = value
+    return [key + tuple(entry) for key, entry in buckets.items()]
+
+
+def update_rollups(conn, rows):
+    """Fold (device_id, metric_id, value, ts) rows into every rollup table."""
+    rows = [row for row in rows if row[3] is not None]
+    if not rows:
+        return
+    for table, width in ROLLUP_TABLES:
+        conn.executemany(UPSERT_ROLLUP_SQL.format(table=table), fold_samples(rows, width))
+
+
+def choose_rollup(width):
+    """
+    Return the coarsest rollup (table, width) whose buckets tile a requested
+    bucket width exactly, or None if only raw samples can answer it.
+    """
+    for table, rollup_width in reversed(ROLLUP_TABLES):
+        if width % rollup_width == 0:
+            return table, rollup_width
+    return None
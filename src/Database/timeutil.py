@@ -0,0 +1,80 @@
+"""
+Timestamp conventions for the metrics database:
+- the ts column holds true UTC epoch milliseconds;
+- naive datetimes and naive timestamp strings, including the TEXT timestamp
+  column, are local wall-clock time on this host;
+- tz-aware datetimes, strings with an offset or 'Z', and numeric epochs are
+  absolute and are converted as such.
+"""
+
+from datetime import datetime
+
+# Values at or above this are taken to be epoch milliseconds rather than seconds
+EPOCH_MS_THRESHOLD = 100_000_000_000
+
+# Fallback formats for timestamps datetime.fromisoformat() rejects (e.g. unpadded fields)
+FALLBACK_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+)
+
+
+def parse_timestamp(value):
+    """Parse an ISO or 'YYYY-MM-DD HH:MM:SS' string into a datetime."""
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    for fmt in FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised timestamp: {value!r}")
+
+
+def to_epoch_ms(value):
+    """
+    Convert a datetime, epoch seconds/milliseconds or timestamp string to
+    integer UTC epoch milliseconds. None is passed through.
+    Naive datetimes and strings are local wall-clock time.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # astimezone() on a naive datetime attaches the local offset in effect then
+            value = value.astimezone()
+        return int(round(value.timestamp() * 1000))
+    if isinstance(value, (int, float)):
+        return int(value) if abs(value) >= EPOCH_MS_THRESHOLD else int(round(value * 1000))
+    if isinstance(value, str):
+        stripped = value.strip()
+        try:
+            return to_epoch_ms(float(stripped))
+        except ValueError:
+            return to_epoch_ms(parse_timestamp(stripped))
+    raise TypeError(f"Cannot convert {type(value).__name__} to a timestamp")
+
+
+def from_epoch_ms(value):
+    """Convert epoch milliseconds back to a naive local wall-clock datetime."""
+    return datetime.fromtimestamp(value / 1000)
+
+
+def to_timestamp_text(value):
+    """Return the TEXT form stored alongside the epoch column: naive local wall-clock time."""
+    if isinstance(value, str):
+        if parse_timestamp(value).tzinfo is None:
+            return value
+        value = parse_timestamp(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value.isoformat()
+    return from_epoch_ms(to_epoch_ms(value)).isoformat()
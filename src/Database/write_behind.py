@@ -0,0 +1,215 @@
+import threading
+import time
+import logging
+from collections import deque
+
+
+class WriteBehindWriter:
+    """
+    Asynchronous write-behind buffer in front of Database.store_samples.
+    Samples are queued in a bounded in-memory buffer and a dedicated writer
+    thread flushes them in batches once batch_size samples are waiting or
+    flush_interval seconds have passed.
+
+    When the buffer is full the backpressure policy decides what happens:
+    'block' waits for room (up to block_timeout seconds, then drops the sample),
+    'drop_oldest' evicts the oldest queued sample and 'drop_newest' discards
+    the incoming one.
+    """
+
+    POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, database, max_queue=10000, batch_size=500, flush_interval=1.0,
+                 policy='block', block_timeout=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+
+        self.database = database
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = None
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'flushes': 0,
+            'max_queue_depth': 0,
+            'last_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, database, config):
+        """Build a writer from the database.write_behind config section."""
+        return cls(
+            database,
+            max_queue=config.get('max_queue', 10000),
+            batch_size=config.get('batch_size', 500),
+            flush_interval=config.get('flush_interval', 1.0),
+            policy=config.get('policy', 'block'),
+            block_timeout=config.get('block_timeout')
+        )
+
+    def start(self):
+        """Start the background writer thread."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, samples):
+        """Queue samples for writing. Returns the number of samples accepted."""
+        accepted = 0
+        with self._lock:
+            for sample in samples:
+                if len(self._queue) >= self.max_queue and not self._make_room():
+                    self._stats['dropped'] += 1
+                    continue
+                self._queue.append(sample)
+                accepted += 1
+
+            self._stats['enqueued'] += accepted
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._queue))
+            if len(self._queue) >= self.batch_size:
+                self._not_empty.notify()
+        return accepted
+
+    def _make_room(self):
+        """Apply the backpressure policy to a full queue. Called with the lock held."""
+        if self.policy == 'drop_newest':
+            return False
+
+        if self.policy == 'drop_oldest':
+            self._queue.popleft()
+            self._stats['dropped'] += 1
+            return True
+
+        # Block until the writer thread frees some space
+        deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+        while len(self._queue) >= self.max_queue:
+            if self._stopping or self._thread is None:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._not_empty.notify()
+            self._not_full.wait(remaining)
+        return True
+
+    def flush(self, timeout=None):
+        """Write everything queued so far. Returns True if the queue drained in time."""
+        with self._lock:
+            if self._thread is None:
+                batch = list(self._queue)
+                self._queue.clear()
+                self._in_flight = len(batch)
+            else:
+                batch = None
+                self._flush_requested = True
+                self._not_empty.notify()
+
+        # No writer thread running, so flush on the caller's thread
+        if batch is not None:
+            if batch:
+                self._write(batch)
+            return True
+
+        with self._lock:
+            return self._drained.wait_for(
+                lambda: not self._queue and not self._in_flight, timeout
+            )
+
+    def close(self, timeout=30.0):
+        """Stop the writer thread after flushing every queued sample."""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                self.logger.warning(f"Write-behind writer did not stop within {timeout}s")
+                return
+            with self._lock:
+                self._thread = None
+
+        # Anything left (e.g. the writer was never started) is written inline
+        self.flush()
+
+    def stats(self):
+        """Return queue depth and flush counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+            stats['in_flight'] = self._in_flight
+        flushes = stats['flushes']
+        stats['avg_flush_seconds'] = stats['total_flush_seconds'] / flushes if flushes else 0.0
+        return stats
+
+    def _run(self):
+        """Writer thread: wait for a size or time threshold, then flush a batch."""
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.flush_interval
+                while (len(self._queue) < self.batch_size and not self._flush_requested
+                       and not self._stopping):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(remaining)
+
+                if not self._queue:
+                    self._flush_requested = False
+                    self._drained.notify_all()
+                    if self._stopping:
+                        return
+                    continue
+
+                count = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._in_flight = count
+                self._not_full.notify_all()
+
+            self._write(batch)
+
+    def _write(self, batch):
+        """Write one batch through the database and record its latency."""
+        started = time.perf_counter()
+        written = failed = 0
+        try:
+            if batch:
+                written = self.database.store_samples(batch)
+        except Exception as e:
+            failed = len(batch)
+            self.logger.error(f"Error flushing {failed} buffered samples: {str(e)}")
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._in_flight = 0
+            self._stats['written'] += written
+            self._stats['failed'] += failed
+            self._stats['flushes'] += 1
+            self._stats['last_flush_seconds'] = elapsed
+            self._stats['total_flush_seconds'] += elapsed
+            if not self._queue:
+                self._drained.notify_all()
@@ -1,7 +1,42 @@
 """
 Monitoring package for the metrics collection application.
-Contains classes for monitoring system and stock metrics.
+Contains the collector framework and the system, stock, disk, network and process monitors.
+
+Monitors are imported on first access, so importing the package (or just the
+collector framework) doesn't load psutil, NumPy or requests until a monitor
+that needs them is used.
 """
 
-from .system_monitor import SystemMonitor
-from .stock_monitor import StockMonitor 
\ No newline at end of file
+import importlib
+
+from .collector import Collector, CollectorRunner, register_collector, create_collectors
+
+# Exported name -> submodule that defines it
+_LAZY_EXPORTS = {
+    'SystemMonitor': 'system_monitor',
+    'StockMonitor': 'stock_monitor',
+    'CpuSampler': 'cpu_sampler',
+    'ProcessCounter': 'process_counter',
+    'DiskMonitor': 'disk_monitor',
+    'NetworkMonitor': 'network_monitor',
+    'ProcessMonitor': 'process_monitor',
+    'QuoteFetcher': 'quote_fetcher',
+    'QuoteError': 'quote_fetcher',
+    'QuoteCache': 'quote_cache',
+    'TokenBucket': 'quote_cache',
+    'Watchlist': 'watchlist',
+}
+
+__all__ = ['Collector', 'CollectorRunner', 'register_collector', 'create_collectors'] + list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,54 @@
+import sys
+import time
+import psutil
+from .process_counter import ProcessCounter
+
+
+def legacy_counts():
+    """The previous SystemMonitor implementation: psutil.pids() plus a process_iter() walk."""
+    process_count = len(psutil.pids())
+    thread_count = 0
+    for proc in psutil.process_iter(['pid', 'num_threads']):
+        try:
+            if 'num_threads' in proc.info and proc.info['num_threads'] is not None:
+                thread_count += proc.info['num_threads']
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+    return {'count': process_count, 'threads': thread_count}
+
+
+def time_call(func, repeat):
+    """Return the best wall time of `repeat` calls, in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(repeat=20):
+    """Time each way of counting processes and threads. Returns (name, ms, counts) rows."""
+    proc_counter = ProcessCounter(mode='proc')
+    psutil_counter = ProcessCounter(mode='psutil')
+    cached_counter = ProcessCounter(mode='proc', refresh_interval=60)
+
+    candidates = (
+        ('legacy', legacy_counts),
+        ('psutil', psutil_counter.counts),
+        (proc_counter.mode, proc_counter.counts),
+        ('cached', cached_counter.counts),
+    )
+    return [(name, time_call(func, repeat), func()) for name, func in candidates]
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"Process and thread counts, best of {repeat}")
+    print(f"{'method':>8} {'time (ms)':>10} {'processes':>10} {'threads':>10} {'speedup':>8}")
+    results = run_benchmark(repeat)
+    baseline = results[0][1]
+    for name, elapsed, counts in results:
+        speedup = baseline / elapsed if elapsed else float('inf')
+        print(f"{name:>8} {elapsed:>10.3f} {counts['count']:>10} {counts['threads']:>10} {speedup:>7.1f}x")
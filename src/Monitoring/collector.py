@@ -0,0 +1,236 @@
+import importlib
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+# Modules that register the built-in collectors, imported on demand so a
+# disabled collector never loads its dependencies
+BUILTIN_MODULES = {
+    'system': 'Monitoring.system_monitor',
+    'stocks': 'Monitoring.stock_monitor',
+    'disks': 'Monitoring.disk_monitor',
+    'network': 'Monitoring.network_monitor',
+    'processes': 'Monitoring.process_monitor',
+}
+
+_REGISTRY = {}
+
+
+def register_collector(name):
+    """Class decorator that registers a Collector subclass under name."""
+    def decorator(cls):
+        cls.name = name
+        _REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+def registered_collectors():
+    """Return the names of every registered collector."""
+    return sorted(_REGISTRY)
+
+
+class Collector:
+    """
+    Base class for metric collectors.
+    A collector gathers one snapshot per run in collect() and converts it to
+    (device, metric, value, timestamp) samples for storage in samples(). It is
+    built by from_config() from its entry in the collectors config section;
+    interval and timeout are filled in by create_collectors().
+    """
+
+    name = None
+    interval = 60
+    timeout = None
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        """Build the collector from its config entry, the full config and shared components."""
+        return cls()
+
+    def collect(self):
+        """Gather and return one snapshot."""
+        raise NotImplementedError
+
+    def samples(self, data):
+        """Convert a snapshot into samples to store. Collectors that store nothing return []."""
+        return []
+
+    def stats(self):
+        """Collector-specific counters to report alongside the runner's, or None."""
+        return None
+
+    def close(self):
+        """Release anything the collector holds (threads, sessions, ...)."""
+        pass
+
+
+def create_collectors(config, context):
+    """
+    Instantiate every enabled collector in the collectors config section.
+    Each entry may name a `module` to import first, which is how plugins
+    register themselves without any change to main.py. The interval falls back
+    to monitoring.<name>.interval and then monitoring.interval.
+    """
+    logger = logging.getLogger(__name__)
+    collectors_config = config.get('collectors', {})
+    monitoring_config = config.get('monitoring', {})
+    default_interval = monitoring_config.get('interval', 60)
+    default_timeout = collectors_config.get('default_timeout')
+
+    collectors = []
+    for name, settings in collectors_config.items():
+        if not isinstance(settings, dict) or not settings.get('enabled', True):
+            continue
+        try:
+            module = settings.get('module', BUILTIN_MODULES.get(name))
+            if module:
+                importlib.import_module(module)
+            if name not in _REGISTRY:
+                raise ValueError(f"No collector registered as {name}")
+
+            collector = _REGISTRY[name].from_config(settings, config, context)
+            collector.interval = settings.get(
+                'interval', monitoring_config.get(name, {}).get('interval', default_interval)
+            )
+            collector.timeout = settings.get('timeout', default_timeout)
+            collectors.append(collector)
+        except Exception as e:
+            logger.error(f"Error creating collector {name}: {str(e)}")
+    return collectors
+
+
+class CollectorRunner:
+    """
+    Runs collectors concurrently on a thread pool, each on its own interval.
+    The scheduler triggers every collector independently and the run itself
+    happens on the pool, bounded by the collector's timeout, so a slow or hung
+    collector never delays the others. A collector whose previous run is still
+    going is skipped rather than queued again, so each collector holds at most
+    one worker; the pool has at least one per collector (max_workers can only
+    raise that), so no run ever waits in the queue behind another collector's.
+
+    Results are published to the snapshot store and their samples queued on
+    the write-behind writer.
+    """
+
+    def __init__(self, collectors, snapshots, writer=None, max_workers=None, on_publish=None):
+        self.collectors = {collector.name: collector for collector in collectors}
+        self.snapshots = snapshots
+        self.writer = writer
+        self.on_publish = on_publish
+        self.logger = logging.getLogger(__name__)
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(max_workers or 0, len(self.collectors), 1),
+            thread_name_prefix="collector"
+        )
+        self._lock = threading.Lock()
+        self._running = {}
+        self._stats = {
+            name: {
+                'interval': collector.interval,
+                'timeout': collector.timeout,
+                'runs': 0,
+                'errors': 0,
+                'timeouts': 0,
+                'skipped': 0,
+                'last_duration': 0.0,
+                'total_duration': 0.0,
+                'last_error': None,
+                'last_success_at': None,
+            }
+            for name, collector in self.collectors.items()
+        }
+        self._last_success = {}
+
+    @classmethod
+    def from_config(cls, config, context, snapshots, writer=None, on_publish=None):
+        """Create the configured collectors and a runner for them."""
+        return cls(
+            create_collectors(config, context),
+            snapshots,
+            writer=writer,
+            max_workers=config.get('collectors', {}).get('max_workers'),
+            on_publish=on_publish
+        )
+
+    def schedule(self, scheduler):
+        """Add a job per collector to the scheduler."""
+        for name, collector in self.collectors.items():
+            scheduler.add_job(name, lambda name=name: self.run(name), collector.interval)
+        return self
+
+    def run(self, name):
+        """Run one collector on the pool, publish its snapshot and queue its samples."""
+        collector = self.collectors[name]
+        stats = self._stats[name]
+
+        with self._lock:
+            previous = self._running.get(name)
+            if previous is not None and not previous.done():
+                stats['skipped'] += 1
+                return False
+            future = self._pool.submit(collector.collect)
+            self._running[name] = future
+
+        started = time.perf_counter()
+        try:
+            data = future.result(timeout=collector.timeout)
+            self.snapshots.publish(name, data)
+            if self.writer is not None:
+                samples = collector.samples(data)
+                if samples:
+                    self.writer.enqueue(samples)
+            if self.on_publish is not None:
+                self.on_publish(name)
+        except FutureTimeoutError:
+            stats['timeouts'] += 1
+            stats['errors'] += 1
+            stats['last_error'] = f"Timed out after {collector.timeout}s"
+            self.logger.warning(f"Collector {name} timed out after {collector.timeout}s")
+            return False
+        except Exception as e:
+            stats['errors'] += 1
+            stats['last_error'] = str(e)
+            self.logger.error(f"Error running collector {name}: {str(e)}")
+            return False
+        finally:
+            elapsed = time.perf_counter() - started
+            stats['runs'] += 1
+            stats['last_duration'] = elapsed
+            stats['total_duration'] += elapsed
+
+        self._last_success[name] = time.monotonic()
+        stats['last_success_at'] = datetime.now().isoformat()
+        return True
+
+    def stats(self):
+        """Return duration, error counts and staleness per collector."""
+        now = time.monotonic()
+        result = {}
+        for name, collector in self.collectors.items():
+            stats = dict(self._stats[name])
+            runs = stats['runs']
+            stats['avg_duration'] = stats['total_duration'] / runs if runs else 0.0
+
+            # A collector is stale once it has missed two intervals' worth of updates
+            last_success = self._last_success.get(name)
+            stats['staleness_seconds'] = now - last_success if last_success is not None else None
+            stats['stale'] = last_success is None or now - last_success > 2 * collector.interval
+            details = collector.stats()
+            if details is not None:
+                stats['details'] = details
+            result[name] = stats
+        return result
+
+    def close(self):
+        """Stop the pool without waiting on hung collectors, then close every collector."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for name, collector in self.collectors.items():
+            try:
+                collector.close()
+            except Exception as e:
+                self.logger.error(f"Error closing collector {name}: {str(e)}")
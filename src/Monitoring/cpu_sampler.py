@@ -0,0 +1,119 @@
+import threading
+import time
+import logging
+import psutil
+
+# Guest time is already counted in user/nice, so it is left out of the total
+GUEST_FIELDS = ('guest', 'guest_nice')
+
+# States that count as idle when computing overall usage
+IDLE_FIELDS = ('idle', 'iowait')
+
+
+class CpuSampler:
+    """
+    Non-blocking CPU usage from deltas of the kernel's cumulative CPU times.
+    A background thread refreshes the baseline every `interval` seconds, so a
+    reading is one cpu_times() call and some arithmetic instead of sleeping a
+    full second the way psutil.cpu_percent(interval=1) does. The overall
+    figure, per-core usage and per-state breakdown all come from the same
+    deltas, so they always agree with each other.
+    """
+
+    def __init__(self, interval=1.0, min_window=0.1):
+        self.interval = interval
+        self.min_window = min_window
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # (monotonic time, per-core cpu times) taken at the last two refreshes
+        self._previous = None
+        self._baseline = self._take()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a sampler from the monitoring.system.cpu_sampling config section."""
+        return cls(
+            interval=config.get('interval', 1.0),
+            min_window=config.get('min_window', 0.1)
+        )
+
+    def start(self):
+        """Refresh the baseline every `interval` seconds on a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cpu-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sample(self):
+        """
+        Return CPU usage since the baseline as
+        {'usage_percent', 'per_core', 'states'}, all in percent.
+        Without the background thread, each call becomes the next baseline,
+        like psutil.cpu_percent(interval=None).
+        """
+        current = self._take()
+        with self._lock:
+            baseline, previous = self._baseline, self._previous
+        
+        # A window that short is mostly rounding noise (0% or 100%), so reach back
+        # a refresh; with none yet (right after construction), wait out the
+        # rest of the window once instead
+        short = current[0] - baseline[0] < self.min_window
+        if short and previous is not None:
+            baseline = previous
+        elif short:
+            time.sleep(self.min_window - (current[0] - baseline[0]))
+            current = self._take()
+        
+        with self._lock:
+            if self._thread is None:
+                self._previous, self._baseline = self._baseline, current
+        return self._usage(baseline[1], current[1])
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                current = self._take()
+                with self._lock:
+                    self._previous, self._baseline = self._baseline, current
+            except Exception as e:
+                self.logger.error(f"Error refreshing CPU baseline: {str(e)}")
+
+    @staticmethod
+    def _take():
+        return time.monotonic(), psutil.cpu_times(percpu=True)
+
+    @staticmethod
+    def _usage(before, after):
+        """Compute overall, per-core and per-state percentages from two cpu_times() lists."""
+        fields = [field for field in after[0]._fields if field not in GUEST_FIELDS]
+        totals = dict.fromkeys(fields, 0.0)
+        per_core = []
+
+        for old, new in zip(before, after):
+            # Counters can step backwards on some kernels (notably iowait), so clamp
+            deltas = {field: max(getattr(new, field) - getattr(old, field), 0.0) for field in fields}
+            core_total = sum(deltas.values())
+            core_idle = sum(deltas.get(field, 0.0) for field in IDLE_FIELDS)
+            per_core.append(round((core_total - core_idle) / core_total * 100, 1) if core_total else 0.0)
+            for field, delta in deltas.items():
+                totals[field] += delta
+
+        total = sum(totals.values())
+        idle = sum(totals.get(field, 0.0) for field in IDLE_FIELDS)
+        return {
+            'usage_percent': round((total - idle) / total * 100, 1) if total else 0.0,
+            'per_core': per_core,
+            'states': {field: round(delta / total * 100, 1) if total else 0.0 for field, delta in totals.items()}
+        }
@@ -0,0 +1,143 @@
+import time
+import logging
+import psutil
+from datetime import datetime
+from .collector import Collector, register_collector
+
+# Block devices that carry no interesting I/O (loopback images, RAM disks)
+DEFAULT_EXCLUDE_DISKS = ('loop', 'ram', 'zram')
+
+# Read-only image mounts that are always 100% full
+DEFAULT_EXCLUDE_FSTYPES = ('squashfs',)
+
+
+class DiskMonitor:
+    """
+    Per-mountpoint usage and per-disk I/O rates.
+    Usage is one statvfs() per mount; the mount list itself changes rarely, so
+    it is re-read only every mount_refresh seconds. I/O rates come from the
+    deltas between consecutive disk_io_counters(perdisk=True) snapshots, which
+    is a single read of the kernel's disk statistics however many devices
+    there are.
+    """
+
+    def __init__(self, exclude_disks=DEFAULT_EXCLUDE_DISKS, exclude_fstypes=DEFAULT_EXCLUDE_FSTYPES,
+                 mount_refresh=60):
+        self.exclude_disks = tuple(exclude_disks)
+        self.exclude_fstypes = set(exclude_fstypes)
+        self.mount_refresh = mount_refresh
+        self.logger = logging.getLogger(__name__)
+
+        self._mounts = None
+        self._mounts_at = 0.0
+        self._previous = self._read_io()
+
+    def get_metrics(self):
+        """Get usage per mountpoint and I/O rates per disk since the last call."""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'mounts': self._get_usage(),
+            'io': self._get_io_rates()
+        }
+
+    def _get_mounts(self):
+        """Return the mountpoints to report, refreshing the list when it is stale."""
+        now = time.monotonic()
+        if self._mounts is None or now - self._mounts_at >= self.mount_refresh:
+            mounts = []
+            for partition in psutil.disk_partitions(all=False):
+                if partition.fstype in self.exclude_fstypes or partition.mountpoint in mounts:
+                    continue
+                mounts.append(partition.mountpoint)
+            self._mounts = mounts
+            self._mounts_at = now
+        return self._mounts
+
+    def _get_usage(self):
+        usage = {}
+        for mountpoint in self._get_mounts():
+            try:
+                disk = psutil.disk_usage(mountpoint)
+            except OSError as e:
+                # Unmounted since the list was read; pick that up on the next refresh
+                self.logger.debug(f"Error reading usage for {mountpoint}: {str(e)}")
+                self._mounts = None
+                continue
+            usage[mountpoint] = {
+                'total': disk.total,
+                'used': disk.used,
+                'free': disk.free,
+                'percent': disk.percent
+            }
+        return usage
+
+    def _read_io(self):
+        """Return (monotonic time, per-disk counters), or None where unsupported."""
+        counters = psutil.disk_io_counters(perdisk=True)
+        if counters is None:
+            return None
+        return time.monotonic(), {
+            name: io for name, io in counters.items()
+            if not name.startswith(self.exclude_disks)
+        }
+
+    def _get_io_rates(self):
+        current = self._read_io()
+        previous, self._previous = self._previous, current
+        if current is None or previous is None:
+            return {}
+
+        elapsed = current[0] - previous[0]
+        if elapsed <= 0:
+            return {}
+
+        rates = {}
+        for name, new in current[1].items():
+            old = previous[1].get(name)
+            if old is None:
+                continue
+            reads = new.read_count - old.read_count
+            writes = new.write_count - old.write_count
+            read_bytes = new.read_bytes - old.read_bytes
+            write_bytes = new.write_bytes - old.write_bytes
+            # Counters restart when a device is re-attached; skip it for one sample
+            if min(reads, writes, read_bytes, write_bytes) < 0:
+                continue
+
+            io_time = (new.read_time - old.read_time) + (new.write_time - old.write_time)
+            busy_time = getattr(new, 'busy_time', None)
+            rates[name] = {
+                'read_bytes_per_sec': read_bytes / elapsed,
+                'write_bytes_per_sec': write_bytes / elapsed,
+                'read_iops': reads / elapsed,
+                'write_iops': writes / elapsed,
+                'await_ms': io_time / (reads + writes) if reads + writes else 0.0,
+                'busy_percent': (
+                    min((busy_time - old.busy_time) / (elapsed * 1000) * 100, 100.0)
+                    if busy_time is not None else None
+                )
+            }
+        return rates
+
+
+@register_collector('disks')
+class DiskCollector(Collector):
+    """Collects per-mount usage and per-disk I/O rates through DiskMonitor."""
+
+    def __init__(self, database, monitor):
+        self.database = database
+        self.monitor = monitor
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        return cls(context['database'], DiskMonitor(
+            exclude_disks=settings.get('exclude_disks', DEFAULT_EXCLUDE_DISKS),
+            exclude_fstypes=settings.get('exclude_fstypes', DEFAULT_EXCLUDE_FSTYPES),
+            mount_refresh=settings.get('mount_refresh', 60)
+        ))
+
+    def collect(self):
+        return self.monitor.get_metrics()
+
+    def samples(self, data):
+        return self.database.build_disk_samples(data)
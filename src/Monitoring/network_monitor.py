@@ -0,0 +1,116 @@
+import time
+import logging
+import psutil
+from collections import Counter
+from datetime import datetime
+from .collector import Collector, register_collector
+
+# Counter field in net_io_counters() -> rate key in the payload
+NETWORK_COUNTER_FIELDS = (
+    ('bytes_sent', 'bytes_sent_per_sec'),
+    ('bytes_recv', 'bytes_recv_per_sec'),
+    ('packets_sent', 'packets_sent_per_sec'),
+    ('packets_recv', 'packets_recv_per_sec'),
+    ('errin', 'errors_in_per_sec'),
+    ('errout', 'errors_out_per_sec'),
+    ('dropin', 'drops_in_per_sec'),
+    ('dropout', 'drops_out_per_sec'),
+)
+
+DEFAULT_EXCLUDE_INTERFACES = ('lo',)
+
+
+class NetworkMonitor:
+    """
+    Per-interface network throughput and connection counts by state.
+    Rates are the deltas against the counters cached from the previous call,
+    so a sample is one net_io_counters(pernic=True) read and O(interfaces)
+    arithmetic. Counting connections means listing every socket, which costs
+    more, so it is refreshed only every connections_refresh seconds
+    (0 disables it).
+    """
+
+    def __init__(self, exclude_interfaces=DEFAULT_EXCLUDE_INTERFACES, connections_refresh=60):
+        self.exclude_interfaces = set(exclude_interfaces)
+        self.connections_refresh = connections_refresh
+        self.logger = logging.getLogger(__name__)
+
+        self._connections = None
+        self._connections_at = 0.0
+        self._previous = self._read_counters()
+
+    def get_metrics(self):
+        """Get per-interface rates since the last call and connection counts by state."""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'interfaces': self._get_rates(),
+            'connections': self._get_connections()
+        }
+
+    def _read_counters(self):
+        # psutil accounts for counter wraparound (nowrap), so what's left
+        # going backwards is a reset
+        counters = psutil.net_io_counters(pernic=True, nowrap=True)
+        return time.monotonic(), {
+            name: io for name, io in counters.items()
+            if name not in self.exclude_interfaces
+        }
+
+    def _get_rates(self):
+        current = self._read_counters()
+        previous, self._previous = self._previous, current
+        elapsed = current[0] - previous[0]
+        if elapsed <= 0:
+            return {}
+
+        rates = {}
+        for name, new in current[1].items():
+            old = previous[1].get(name)
+            # Interfaces that just appeared get a rate from the next sample on
+            if old is None:
+                continue
+            deltas = [(key, getattr(new, field) - getattr(old, field)) for field, key in NETWORK_COUNTER_FIELDS]
+            # Counters restart when a driver reloads or an interface is re-created
+            # under the same name; skip it for one sample
+            if min(delta for _, delta in deltas) < 0:
+                continue
+            rates[name] = {key: delta / elapsed for key, delta in deltas}
+        return rates
+
+    def _get_connections(self):
+        """Return connection counts by state, re-read every connections_refresh seconds."""
+        if not self.connections_refresh:
+            return None
+        now = time.monotonic()
+        if self._connections is None or now - self._connections_at >= self.connections_refresh:
+            try:
+                states = Counter(conn.status for conn in psutil.net_connections(kind='inet'))
+                self._connections = dict(states, total=sum(states.values()))
+            except psutil.AccessDenied:
+                self.logger.warning("Not permitted to list connections, disabling connection counts")
+                self.connections_refresh = 0
+                return None
+            self._connections_at = now
+        return self._connections
+
+
+@register_collector('network')
+class NetworkCollector(Collector):
+    """Collects per-interface throughput and connection counts through NetworkMonitor."""
+
+    def __init__(self, database, monitor):
+        self.database = database
+        self.monitor = monitor
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        return cls(context['database'], NetworkMonitor(
+            exclude_interfaces=settings.get('exclude_interfaces', DEFAULT_EXCLUDE_INTERFACES),
+            connections_refresh=settings.get('connections_refresh', 60)
+        ))
+
+    def collect(self):
+        return self.monitor.get_metrics()
+
+    def samples(self, data):
+        return self.database.build_network_samples(data)
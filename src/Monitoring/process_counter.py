@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+import logging
+import psutil
+
+PROC_PATH = '/proc'
+
+
+class ProcessCounter:
+    """
+    Process and thread counts without visiting every process.
+    On Linux the process count is one scandir() of /proc and the thread count
+    is the scheduling-entity total the kernel already keeps in /proc/loadavg,
+    so neither depends on opening a file per process. Elsewhere, or with
+    mode='psutil', it falls back to walking psutil.process_iter().
+
+    Counts are cached for refresh_interval seconds (0 re-reads every call).
+    """
+
+    MODES = ('proc', 'psutil')
+
+    def __init__(self, mode='proc', refresh_interval=0, proc_path=PROC_PATH):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown process count mode: {mode}")
+        self.logger = logging.getLogger(__name__)
+        self.proc_path = proc_path
+        self.refresh_interval = refresh_interval
+
+        if mode == 'proc' and not os.path.exists(os.path.join(proc_path, 'loadavg')):
+            self.logger.info(f"{proc_path} not available, counting processes with psutil")
+            mode = 'psutil'
+        self.mode = mode
+
+        self._lock = threading.Lock()
+        self._counts = None
+        self._counted_at = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a counter from the monitoring.system.process_counts config section."""
+        return cls(
+            mode=config.get('mode', 'proc'),
+            refresh_interval=config.get('refresh_interval', 0)
+        )
+
+    def counts(self):
+        """Return {'count': processes, 'threads': threads}, refreshing if stale."""
+        with self._lock:
+            now = time.monotonic()
+            if self._counts is None or now - self._counted_at >= self.refresh_interval:
+                if self.mode == 'proc':
+                    try:
+                        self._counts = self._count_proc()
+                    except OSError as e:
+                        self.logger.warning(f"Error reading {self.proc_path}, falling back to psutil: {str(e)}")
+                        self.mode = 'psutil'
+                        self._counts = self._count_psutil()
+                else:
+                    self._counts = self._count_psutil()
+                self._counted_at = now
+            return dict(self._counts)
+
+    def _count_proc(self):
+        """Count /proc/<pid> entries and read the thread total from /proc/loadavg."""
+        with os.scandir(self.proc_path) as entries:
+            processes = sum(1 for entry in entries if entry.name.isdigit())
+
+        # Fourth field is "<runnable>/<total>" scheduling entities, i.e. threads
+        with open(os.path.join(self.proc_path, 'loadavg')) as f:
+            threads = int(f.read().split()[3].split('/')[1])
+
+        return {'count': processes, 'threads': threads}
+
+    @staticmethod
+    def _count_psutil():
+        """Count processes and sum their threads with psutil (one visit per process)."""
+        process_count = 0
+        thread_count = 0
+        for proc in psutil.process_iter(['num_threads']):
+            process_count += 1
+            try:
+                # Check if num_threads is in proc.info and is not None
+                if proc.info.get('num_threads') is not None:
+                    thread_count += proc.info['num_threads']
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return {'count': process_count, 'threads': thread_count}
@@ -0,0 +1,96 @@
+import logging
+import psutil
+from datetime import datetime
+from .collector import Collector, register_collector
+
+
+class ProcessMonitor:
+    """
+    Top-N processes by CPU and by resident memory.
+    psutil.Process objects are kept between runs, keyed by pid, so
+    cpu_percent() is the delta since the previous run instead of a blocking
+    measurement. Exited processes are dropped every run, so the cache never
+    holds more than the processes currently alive.
+    """
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self.logger = logging.getLogger(__name__)
+        self._processes = {}
+        self._refresh()
+
+    def get_metrics(self):
+        """Get the top_n processes by CPU percent and by RSS since the last call."""
+        rows = self._refresh()
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'tracked': len(self._processes),
+            'top_cpu': self._top(rows, 'cpu_percent'),
+            'top_memory': self._top(rows, 'rss')
+        }
+
+    def _refresh(self):
+        """Sync the cache with the live pid list and sample every process once."""
+        pids = set(psutil.pids())
+        for pid in list(self._processes):
+            if pid not in pids:
+                del self._processes[pid]
+
+        rows = []
+        for pid in pids:
+            proc = self._processes.get(pid)
+            try:
+                if proc is None:
+                    proc = self._processes[pid] = psutil.Process(pid)
+                with proc.oneshot():
+                    rows.append((pid, proc.cpu_percent(None), proc.memory_info().rss))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self._processes.pop(pid, None)
+        return rows
+
+    def _top(self, rows, key):
+        """Return the top_n rows by key, named only for the processes reported."""
+        index = 1 if key == 'cpu_percent' else 2
+        top = []
+        for pid, cpu_percent, rss in sorted(rows, key=lambda row: row[index], reverse=True):
+            if len(top) == self.top_n:
+                break
+            proc = self._processes.get(pid)
+            try:
+                # Checking for pid reuse costs a read per process, so only the
+                # candidates are checked; a reused pid restarts its CPU baseline
+                if proc is None or not proc.is_running():
+                    self._processes[pid] = psutil.Process(pid)
+                    self._processes[pid].cpu_percent(None)
+                    continue
+                name = proc.name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self._processes.pop(pid, None)
+                continue
+            top.append({
+                'rank': len(top) + 1,
+                'pid': pid,
+                'name': name,
+                'cpu_percent': cpu_percent,
+                'rss': rss
+            })
+        return top
+
+
+@register_collector('processes')
+class ProcessCollector(Collector):
+    """Collects the top processes by CPU and memory through ProcessMonitor."""
+
+    def __init__(self, database, monitor):
+        self.database = database
+        self.monitor = monitor
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        return cls(context['database'], ProcessMonitor(top_n=settings.get('top_n', 5)))
+
+    def collect(self):
+        return self.monitor.get_metrics()
+
+    def samples(self, data):
+        return self.database.build_process_samples(data)
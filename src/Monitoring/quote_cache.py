@@ -0,0 +1,230 @@
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` tokens are added every `per` seconds, up
+    to `capacity` (defaults to rate, i.e. a full quota can be spent at once).
+    """
+
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if they are available right now. Returns True on success."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Wait up to timeout seconds (forever if None) for tokens. Returns True on success."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) * self.per / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    return False
+            time.sleep(wait)
+
+    def available(self):
+        """Return the number of tokens available now."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class QuoteCache:
+    """
+    Per-symbol TTL cache in front of a QuoteFetcher, with the same fetch() API.
+
+    A quote younger than ttl is served from the cache. An older one, up to
+    stale_ttl, is still served immediately while a background refresh fetches
+    a new one (stale-while-revalidate); past stale_ttl the caller waits for a
+    fresh fetch. Concurrent callers missing the same symbol share one in-flight
+    request, and every request spends a token from the rate limiter. The
+    limiter is shared with the fetcher so its retries spend tokens too, and
+    the provider's quota is never exceeded. When no token is available in time
+    the last known quote is served instead.
+
+    The same quote object is returned until it is refetched, so callers can
+    tell a new quote from a cached one by identity.
+    """
+
+    def __init__(self, fetcher, ttl=60.0, stale_ttl=300.0, rate_limiter=None, max_wait=5.0):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.rate_limiter = rate_limiter
+        self.max_wait = max_wait
+        if rate_limiter is not None and hasattr(fetcher, 'rate_limiter'):
+            # Retries are requests too: charge them to the same budget
+            fetcher.rate_limiter = rate_limiter
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries = {}    # symbol -> (quote, fetched_at)
+        self._in_flight = {}  # symbol -> Future resolving to the new quote or None
+        self._revalidator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote-revalidate")
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'fetches': 0,
+            'symbols_fetched': 0,
+            'rate_limited': 0,
+        }
+
+    @classmethod
+    def from_config(cls, fetcher, config):
+        """Build a cache from the monitoring.stocks.cache and rate_limit config sections."""
+        cache_config = config.get('cache', {})
+        rate_config = config.get('rate_limit')
+        rate_limiter = None
+        if rate_config:
+            rate_limiter = TokenBucket(
+                rate_config.get('requests', 5),
+                per=rate_config.get('per', 60.0),
+                capacity=rate_config.get('burst')
+            )
+        return cls(
+            fetcher,
+            ttl=cache_config.get('ttl', 60.0),
+            stale_ttl=cache_config.get('stale_ttl', 300.0),
+            rate_limiter=rate_limiter,
+            max_wait=cache_config.get('max_wait', 5.0)
+        )
+
+    def fetch(self, symbols):
+        """Return {symbol: quote} for every symbol with a fresh, stale or newly fetched quote."""
+        now = time.monotonic()
+        quotes = {}
+        to_fetch = []
+        to_revalidate = []
+        waiting = {}
+
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get(symbol)
+                age = now - entry[1] if entry else None
+                if entry and age < self.ttl:
+                    self._stats['hits'] += 1
+                    quotes[symbol] = entry[0]
+                    continue
+
+                if entry and age < self.stale_ttl:
+                    self._stats['stale_hits'] += 1
+                    quotes[symbol] = entry[0]
+                    if symbol not in self._in_flight:
+                        self._in_flight[symbol] = Future()
+                        to_revalidate.append(symbol)
+                    continue
+
+                self._stats['misses'] += 1
+                if symbol in self._in_flight:
+                    self._stats['coalesced'] += 1
+                    waiting[symbol] = self._in_flight[symbol]
+                else:
+                    self._in_flight[symbol] = Future()
+                    to_fetch.append(symbol)
+
+        if to_revalidate:
+            self._revalidator.submit(self._refresh, to_revalidate, 0)
+        if to_fetch:
+            quotes.update(self._refresh(to_fetch, self.max_wait))
+
+        for symbol, future in waiting.items():
+            try:
+                quote = future.result(timeout=self.max_wait + self._fetch_timeout())
+            except Exception:
+                quote = None
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+
+    def _fetch_timeout(self):
+        return getattr(self.fetcher, 'timeout', 5.0) * (getattr(self.fetcher, 'retries', 0) + 1)
+
+    def _refresh(self, symbols, wait):
+        """Fetch symbols as far as the rate limit allows and resolve their in-flight futures."""
+        permitted = self._take_tokens(symbols, wait)
+        quotes = {}
+        try:
+            if permitted:
+                quotes = self.fetcher.fetch(permitted)
+        except Exception as e:
+            self.logger.error(f"Error refreshing quotes for {', '.join(permitted)}: {str(e)}")
+
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            if permitted:
+                self._stats['fetches'] += 1
+                self._stats['symbols_fetched'] += len(quotes)
+            for symbol in symbols:
+                if symbol in quotes:
+                    self._entries[symbol] = (quotes[symbol], now)
+                # Without a new quote, fall back to the last known one however old
+                entry = self._entries.get(symbol)
+                if entry is not None:
+                    result[symbol] = entry[0]
+                future = self._in_flight.pop(symbol, None)
+                if future is not None:
+                    future.set_result(result.get(symbol))
+        return result
+
+    def _take_tokens(self, symbols, wait):
+        """Return the leading symbols the rate limiter has budget for, one token per request."""
+        if self.rate_limiter is None:
+            return list(symbols)
+
+        # Batch-capable fetchers spend one request per batch_size symbols
+        group_size = getattr(self.fetcher, 'batch_size', None) or 1
+        deadline = time.monotonic() + wait
+        permitted = []
+        for i in range(0, len(symbols), group_size):
+            if not self.rate_limiter.acquire(1, timeout=max(deadline - time.monotonic(), 0)):
+                with self._lock:
+                    self._stats['rate_limited'] += len(symbols) - i
+                break
+            permitted.extend(symbols[i:i + group_size])
+        return permitted
+
+    def stats(self):
+        """Return hit/miss counters, cache size and remaining rate-limit tokens."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['in_flight'] = len(self._in_flight)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else 0.0
+        if self.rate_limiter is not None:
+            stats['tokens_available'] = self.rate_limiter.available()
+        return stats
+
+    def close(self):
+        """Stop background revalidation and close the underlying fetcher."""
+        self._revalidator.shutdown(wait=False, cancel_futures=True)
+        self.fetcher.close()
@@ -0,0 +1,168 @@
+import random
+import time
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+
+# Responses worth another attempt: rate limiting and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class QuoteError(Exception):
+    """A quote request failed in a way retrying won't fix."""
+    pass
+
+
+class QuoteFetcher:
+    """
+    Concurrent stock quote fetcher for the Alpha Vantage API.
+    All requests share one requests.Session whose connection pool is sized to
+    the worker count, so connections are reused instead of re-negotiated per
+    quote. Symbols are fetched on a bounded thread pool, each request has its
+    own timeout, and connection errors, timeouts, 429s and 5xx responses are
+    retried with exponential backoff and full jitter. A 429's Retry-After is
+    honored, and one longer than timeout ends the request instead.
+
+    Each retry is another request against the provider's quota. With a
+    rate_limiter, every retry spends a token from it (the first attempt is
+    charged by the caller, e.g. QuoteCache) and a 429 is not retried at all,
+    since it means the limiter's budget is already spent on the provider's
+    side.
+
+    With batch_size set, symbols are requested batch_size at a time from the
+    batch quote endpoint instead of one GLOBAL_QUOTE call each. base_url can
+    point at a local stub server for testing.
+    """
+
+    def __init__(self, api_key, base_url=ALPHA_VANTAGE_URL, max_workers=4, timeout=5.0,
+                 retries=3, backoff=0.5, batch_size=None, rate_limiter=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter
+        self.logger = logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote-fetcher")
+
+    @classmethod
+    def from_config(cls, api_key, config):
+        """Build a fetcher from the monitoring.stocks.fetcher config section."""
+        return cls(
+            api_key,
+            base_url=config.get('base_url', ALPHA_VANTAGE_URL),
+            max_workers=config.get('max_workers', 4),
+            timeout=config.get('timeout', 5.0),
+            retries=config.get('retries', 3),
+            backoff=config.get('backoff', 0.5),
+            batch_size=config.get('batch_size')
+        )
+
+    def fetch(self, symbols):
+        """
+        Fetch quotes for symbols concurrently.
+        Returns {symbol: {'price', 'volume', 'change', 'change_percent'}} for
+        every symbol that could be fetched; failures are logged and left out.
+        """
+        symbols = list(symbols)
+        if self.batch_size:
+            groups = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+            futures = {', '.join(group): self._pool.submit(self._fetch_batch, group) for group in groups}
+        else:
+            futures = {symbol: self._pool.submit(self._fetch_one, symbol) for symbol in symbols}
+
+        quotes = {}
+        for requested, future in futures.items():
+            try:
+                quotes.update(future.result())
+            except Exception as e:
+                self.logger.error(f"Error fetching quotes for {requested}: {str(e)}")
+        return quotes
+
+    def _fetch_one(self, symbol):
+        """Fetch one symbol from the GLOBAL_QUOTE endpoint."""
+        data = self._get({'function': 'GLOBAL_QUOTE', 'symbol': symbol})
+        quote = data.get('Global Quote')
+        if not quote:
+            raise QuoteError(f"No quote returned for {symbol}")
+        return {symbol: {
+            'price': float(quote['05. price']),
+            'volume': int(quote['06. volume']),
+            'change': float(quote['09. change']),
+            'change_percent': float(quote['10. change percent'].rstrip('%'))
+        }}
+
+    def _fetch_batch(self, symbols):
+        """Fetch several symbols in one request from the batch quote endpoint."""
+        data = self._get({'function': 'BATCH_STOCK_QUOTES', 'symbols': ','.join(symbols)})
+        quotes = {}
+        for quote in data.get('Stock Quotes', []):
+            volume = quote.get('3. volume')
+            quotes[quote['1. symbol']] = {
+                'price': float(quote['2. price']),
+                'volume': int(volume) if volume not in (None, '', '--') else 0
+            }
+        missing = set(symbols) - set(quotes)
+        if missing:
+            self.logger.warning(f"No batch quote returned for {', '.join(sorted(missing))}")
+        return quotes
+
+    def _get(self, params):
+        """GET base_url with params, retrying transient failures. Returns the decoded JSON."""
+        params = dict(params, apikey=self.api_key)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = response.json()
+                    # Alpha Vantage reports errors and quota limits in a 200 response
+                    for key in ('Error Message', 'Note', 'Information'):
+                        if key in data:
+                            raise QuoteError(data[key])
+                    return data
+                status = response.status_code
+                error = f"HTTP {status}"
+                retry_after = self._retry_after(response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                status = None
+                error = str(e)
+                retry_after = None
+
+            if attempt == self.retries:
+                break
+            if status == 429 and self.rate_limiter is not None:
+                raise QuoteError(f"Rate limited by the provider: {error}")
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if retry_after is not None:
+                if retry_after > self.timeout:
+                    raise QuoteError(f"{error}, retry after {retry_after:.0f}s")
+                delay = max(delay, retry_after)
+            if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+                raise QuoteError(f"No rate-limit budget to retry after: {error}")
+            self.logger.debug(f"Retrying {params.get('function')} in {delay:.2f}s after: {error}")
+            time.sleep(delay)
+        raise QuoteError(f"Giving up after {attempt + 1} attempts: {error}")
+
+    @staticmethod
+    def _retry_after(response):
+        """Return a response's Retry-After delay in seconds, or None if absent or not in seconds."""
+        try:
+            return max(float(response.headers.get('Retry-After')), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def close(self):
+        """Stop the worker pool and close the pooled connections."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -1,93 +1,147 @@
-import requests
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 import os
-import time  # Import the time module
-import random  # Add import for random
+import logging
+import numpy as np
 from Database.database import Database
-
-# Get the absolute path to the config file
-config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.json')
-
-# Load API key from configuration file
-with open(config_path, 'r') as config_file:
-    config = json.load(config_file)
+from .collector import Collector, register_collector
+from .watchlist import Watchlist
 
 class StockMonitor:
-    def __init__(self, symbols, database=None):
+    def __init__(self, symbols, database=None, fetcher=None):
         self.symbols = symbols
-        self.api_key = config['alpha_vantage_api_key']
         self.db = database if database else Database()  # Use provided database or create new one
-        self.previous_prices = {}  # Store previous prices
+        self.fetcher = fetcher  # QuoteFetcher (or QuoteCache) for real quotes; mock data without one
+        self.logger = logging.getLogger(__name__)
+        self.watchlist = Watchlist(symbols)  # Prices, volumes and changes by symbol slot
+        self.last_quotes = {}  # symbol -> quote last applied, to spot cached repeats
+        self.rng = np.random.default_rng()
+        
+        # Mock data is based on the symbol, so its base price and volume are fixed per slot
+        self.mock_base_price = np.array([150.0 + (hash(symbol) % 100) for symbol in symbols])
+        self.mock_base_volume = np.array([1000000 + (hash(symbol) % 9000000) for symbol in symbols], dtype=np.int64)
+        
+        self._stats = {
+            'collections': 0,
+            'quotes_new': 0,
+            'quotes_unchanged': 0,
+            'quotes_missing': 0,
+        }
         self._load_previous_prices()  # Load previous prices from database
 
     def _load_previous_prices(self):
-        """Load previous prices from the database for each symbol."""
-        for symbol in self.symbols:
-            try:
-                # Get the most recent price from the database
-                device_name = f"Stock-{symbol}"
-                metric_name = "Price"
-                data = self.db.get_metrics_by_timerange(device_name, metric_name, limit=1)
-                
-                if data and len(data) > 0:
-                    # Value is at index 1 in the tuple
-                    self.previous_prices[symbol] = data[0][1]
-                else:
-                    self.previous_prices[symbol] = None
-            except Exception as e:
-                print(f"Error loading previous price for {symbol}: {str(e)}")
-                self.previous_prices[symbol] = None
+        """Load the latest stored price of every symbol with a single query."""
+        try:
+            latest = self.db.get_latest_values([f"Stock-{symbol}" for symbol in self.symbols], "Price")
+            self.watchlist.load_previous({
+                device_name[len("Stock-"):]: price for device_name, price in latest.items()
+            })
+        except Exception as e:
+            self.logger.error(f"Error loading previous prices: {str(e)}")
 
     def get_metrics(self):
-        """Get current stock metrics using mock data."""
-        stock_data = {}
+        """Get current stock metrics from the quote fetcher, or mock data without one."""
+        if self.fetcher is None:
+            new, unchanged, missing = self._apply_mock_quotes()
+        else:
+            new, unchanged, missing = self._apply_quotes(self.fetcher.fetch(self.symbols))
         
-        # Use mock data for all symbols
-        for symbol in self.symbols:
-            try:
-                # Generate mock data based on symbol with some randomness
-                base_price = 150.0 + (hash(symbol) % 100)
-                # Add random fluctuation of up to ±5%
-                fluctuation = random.uniform(-0.05, 0.05)
-                mock_price = base_price * (1 + fluctuation)
-                mock_volume = 1000000 + (hash(symbol) % 9000000) + random.randint(-500000, 500000)
-                
-                # Calculate change based on previous price
-                previous_price = self.previous_prices.get(symbol)
-                if previous_price is not None:
-                    change = mock_price - previous_price
-                    change_percent = (change / previous_price) * 100 if previous_price > 0 else 0
-                else:
-                    change = 0
-                    change_percent = 0
-                
-                # Store the current price for next time
-                self.previous_prices[symbol] = mock_price
-                
-                # Create stock data entry
-                stock_data[symbol] = {
-                    'price': mock_price,
-                    'volume': mock_volume,
-                    'change': change,
-                    'change_percent': change_percent,
-                    'market_cap': mock_price * 1000000000  # Mock market cap
-                }
-                
-                print(f"Using mock data for {symbol}: Price = ${mock_price:.2f}")
-                
-            except Exception as e:
-                print(f"Error getting data for {symbol}: {str(e)}")
-                # Provide fallback data
-                stock_data[symbol] = {
-                    'price': 0,
-                    'volume': 0,
-                    'change': 0,
-                    'change_percent': 0,
-                    'market_cap': 0
-                }
+        self._stats['collections'] += 1
+        self._stats['quotes_new'] += new
+        self._stats['quotes_unchanged'] += unchanged
+        self._stats['quotes_missing'] += missing
+        if missing:
+            self.logger.warning(f"No quote for {missing} of {len(self.symbols)} symbols")
+        self.logger.debug(f"Collected {len(self.symbols)} quotes ({new} new, {unchanged} unchanged, {missing} missing)")
         
         return {
             'timestamp': datetime.now().isoformat(),
-            'data': stock_data
-        } 
\ No newline at end of file
+            'data': self.watchlist.to_dict()
+        }
+
+    def _apply_mock_quotes(self):
+        """Generate mock data for every slot at once, with up to ±5% random fluctuation."""
+        count = len(self.symbols)
+        prices = self.mock_base_price * (1 + self.rng.uniform(-0.05, 0.05, count))
+        volumes = self.mock_base_volume + self.rng.integers(-500000, 500000, count, endpoint=True)
+        self.watchlist.update(np.arange(count), prices, volumes)
+        return count, 0, 0
+
+    def _apply_quotes(self, quotes):
+        """
+        Apply fetched quotes to the watchlist. A quote object already applied (a
+        cache hit) keeps the change computed when it was new. Returns
+        (new, unchanged, missing) counts.
+        """
+        slots, prices, volumes, missing = [], [], [], []
+        unchanged = 0
+        for symbol, slot in self.watchlist.slots.items():
+            quote = quotes.get(symbol)
+            if quote is None:
+                missing.append(slot)
+            elif self.last_quotes.get(symbol) is quote:
+                unchanged += 1
+            else:
+                self.last_quotes[symbol] = quote
+                slots.append(slot)
+                prices.append(quote['price'])
+                volumes.append(quote['volume'])
+        
+        if slots:
+            self.watchlist.update(slots, prices, volumes)
+        if missing:
+            self.watchlist.invalidate(missing)
+        return len(slots), unchanged, len(missing)
+
+    def stats(self):
+        """Return quote counters across collections."""
+        return dict(self._stats)
+
+
+@register_collector('stocks')
+class StockCollector(Collector):
+    """Collects quotes for the configured watchlist through StockMonitor."""
+
+    def __init__(self, symbols, database, fetcher=None):
+        self.database = database
+        self.fetcher = fetcher
+        self.monitor = StockMonitor(symbols, database, fetcher)
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        stocks_config = config['monitoring']['stocks']
+        fetcher = None
+        if stocks_config.get('source', 'mock') == 'alpha_vantage':
+            # Imported here so mock mode never loads requests
+            from .quote_fetcher import QuoteFetcher
+            from .quote_cache import QuoteCache
+            api_key = os.getenv('ALPHA_VANTAGE_API_KEY', config.get('alpha_vantage_api_key'))
+            fetcher = QuoteFetcher.from_config(api_key, stocks_config.get('fetcher', {}))
+            if stocks_config.get('cache', {}).get('enabled', True):
+                fetcher = QuoteCache.from_config(fetcher, stocks_config)
+        return cls(stocks_config['symbols'], context['database'], fetcher)
+
+    def collect(self):
+        return self.monitor.get_metrics()
+
+    def stats(self):
+        stats = {'monitor': self.monitor.stats()}
+        # Only a QuoteCache keeps counters; a bare QuoteFetcher has no stats()
+        if hasattr(self.fetcher, 'stats'):
+            stats['quote_cache'] = self.fetcher.stats()
+        return stats
+
+    def close(self):
+        if self.fetcher is not None:
+            self.fetcher.close()
+
+    def samples(self, data):
+        return self.database.build_stock_samples({
+            'timestamp': data['timestamp'],
+            'stocks': {symbol: {
+                'price': quote['price'],
+                'volume': quote['volume'],
+                'change': quote.get('change', 0),
+                'change_percent': quote.get('change_percent', 0),
+                'market_cap': quote.get('market_cap', 0)
+            } for symbol, quote in data['data'].items()}
+        })
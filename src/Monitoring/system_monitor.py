@@ -1,48 +1,110 @@
 import psutil
 import platform
+import time
 from datetime import datetime
+from .process_counter import ProcessCounter
+from .cpu_sampler import CpuSampler
+from .collector import Collector, register_collector
 
 class SystemMonitor:
+    def __init__(self, cpu_sampler=None, process_counter=None):
+        # With a CpuSampler, CPU usage is read from deltas instead of blocking for a second
+        self.cpu_sampler = cpu_sampler
+        self.process_counter = process_counter if process_counter else ProcessCounter()
+
+        # Host details don't change while we run, and platform.processor() can
+        # shell out, so they are looked up once
+        self.cpu_count = psutil.cpu_count()
+        self.system_info = {
+            'system': platform.system(),
+            'platform': platform.platform(),
+            'processor': platform.processor()
+        }
+
     def get_metrics(self):
         """Get current system metrics."""
-        # Get process information
-        process_count = len(psutil.pids())
-        thread_count = 0
-        
-        # Count threads across all processes
-        for proc in psutil.process_iter(['pid', 'num_threads']):
-            try:
-                # Check if num_threads is in proc.info and is not None
-                if 'num_threads' in proc.info and proc.info['num_threads'] is not None:
-                    thread_count += proc.info['num_threads']
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        
+        timings = {}
+        started = time.perf_counter()
+
+        cpu = self._timed(timings, 'cpu', self._get_cpu)
+        memory = self._timed(timings, 'memory', psutil.virtual_memory)
+        disk = self._timed(timings, 'disk', lambda: psutil.disk_usage('/'))
+        processes = self._timed(timings, 'processes', self.process_counter.counts)
+        timings['total'] = (time.perf_counter() - started) * 1000
+
         return {
             'timestamp': datetime.now().isoformat(),
-            'cpu': {
-                'usage_percent': psutil.cpu_percent(interval=1),
-                'cores': psutil.cpu_count(),
-                'frequency': psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None
-            },
+            'cpu': cpu,
             'memory': {
-                'total': psutil.virtual_memory().total,
-                'available': psutil.virtual_memory().available,
-                'percent': psutil.virtual_memory().percent
+                'total': memory.total,
+                'available': memory.available,
+                'percent': memory.percent
             },
             'disk': {
-                'total': psutil.disk_usage('/').total,
-                'used': psutil.disk_usage('/').used,
-                'free': psutil.disk_usage('/').free,
-                'percent': psutil.disk_usage('/').percent
-            },
-            'processes': {
-                'count': process_count,
-                'threads': thread_count
+                'total': disk.total,
+                'used': disk.used,
+                'free': disk.free,
+                'percent': disk.percent
             },
-            'system_info': {
-                'system': platform.system(),
-                'platform': platform.platform(),
-                'processor': platform.processor()
-            }
-        } 
\ No newline at end of file
+            'processes': processes,
+            'system_info': self.system_info,
+            'timings_ms': timings
+        }
+
+    def _get_cpu(self):
+        """Get CPU usage, core count and current frequency."""
+        frequency = psutil.cpu_freq()
+        cpu = {
+            'cores': self.cpu_count,
+            'frequency': frequency._asdict() if frequency else None
+        }
+        if self.cpu_sampler is not None:
+            cpu.update(self.cpu_sampler.sample())
+        else:
+            cpu['usage_percent'] = psutil.cpu_percent(interval=1)
+        return cpu
+
+    @staticmethod
+    def _timed(timings, name, func):
+        """Call func, recording its wall time in milliseconds under name."""
+        started = time.perf_counter()
+        result = func()
+        timings[name] = (time.perf_counter() - started) * 1000
+        return result
+
+
+@register_collector('system')
+class SystemCollector(Collector):
+    """Collects host CPU, memory, disk and process metrics through SystemMonitor."""
+
+    def __init__(self, database, cpu_sampler=None, process_counter=None):
+        self.database = database
+        self.cpu_sampler = cpu_sampler
+        self.monitor = SystemMonitor(cpu_sampler, process_counter)
+
+    @classmethod
+    def from_config(cls, settings, config, context):
+        system_config = config.get('monitoring', {}).get('system', {})
+        cpu_sampler = None
+        cpu_sampling = system_config.get('cpu_sampling', {})
+        if cpu_sampling.get('mode', 'delta') == 'delta':
+            cpu_sampler = CpuSampler.from_config(cpu_sampling).start()
+        process_counter = ProcessCounter.from_config(system_config.get('process_counts', {}))
+        return cls(context['database'], cpu_sampler, process_counter)
+
+    def collect(self):
+        return self.monitor.get_metrics()
+
+    def samples(self, data):
+        return self.database.build_system_samples({
+            'timestamp': data['timestamp'],
+            'cpu_percent': data['cpu']['usage_percent'],
+            'memory_percent': data['memory']['percent'],
+            'disk_percent': data['disk']['percent'],
+            'running_processes': data['processes']['count'],
+            'thread_count': data['processes']['threads']
+        })
+
+    def close(self):
+        if self.cpu_sampler is not None:
+            self.cpu_sampler.stop()
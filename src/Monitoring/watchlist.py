@@ -0,0 +1,87 @@
+import numpy as np
+
+# Placeholder market cap: shares outstanding aren't available from the quote feed
+MOCK_SHARES_OUTSTANDING = 1000000000
+
+
+class Watchlist:
+    """
+    Array-backed state for a stock watchlist.
+    Every symbol owns a fixed slot in a set of NumPy arrays (last price,
+    volume, change, ...), so updating prices and computing change and change
+    percent for a batch of quotes is a handful of vectorized operations rather
+    than a Python loop per symbol.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.slots = {symbol: slot for slot, symbol in enumerate(self.symbols)}
+        size = len(self.symbols)
+
+        # Last known price per slot (NaN until one is seen), the baseline for change
+        self.previous = np.full(size, np.nan)
+        self.price = np.zeros(size)
+        self.volume = np.zeros(size, dtype=np.int64)
+        self.change = np.zeros(size)
+        self.change_percent = np.zeros(size)
+        # Slots that have a current quote; the rest are left out of to_dict()
+        self.valid = np.zeros(size, dtype=bool)
+
+    def load_previous(self, prices):
+        """Seed the change baseline from {symbol: price} (e.g. the last stored prices)."""
+        known = [(self.slots[symbol], price) for symbol, price in prices.items() if symbol in self.slots]
+        if known:
+            slots, values = zip(*known)
+            self.previous[list(slots)] = values
+
+    def update(self, slots, prices, volumes):
+        """
+        Apply new quotes to the given slots and compute change against each slot's
+        previous price. Slots without a previous price get a change of zero.
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        prices = np.asarray(prices, dtype=float)
+        previous = self.previous[slots]
+
+        has_previous = ~np.isnan(previous)
+        change = np.where(has_previous, prices - previous, 0.0)
+        positive = has_previous & (previous > 0)
+        change_percent = np.divide(change * 100, previous, out=np.zeros_like(change), where=positive)
+
+        self.price[slots] = prices
+        self.volume[slots] = volumes
+        self.change[slots] = change
+        self.change_percent[slots] = change_percent
+        self.previous[slots] = prices
+        self.valid[slots] = True
+
+    def invalidate(self, slots):
+        """Mark slots as having no current quote, keeping their change baseline."""
+        self.valid[np.asarray(slots, dtype=np.intp)] = False
+
+    def to_dict(self):
+        """
+        Return {symbol: {'price', 'volume', 'change', 'change_percent', 'market_cap'}}
+        for the slots with a current quote. Symbols without one are omitted, so
+        a missing quote is never reported (or stored) as a zero price.
+        """
+        slots = np.flatnonzero(self.valid)
+        price = self.price[slots]
+        columns = zip(
+            [self.symbols[slot] for slot in slots.tolist()],
+            price.tolist(),
+            self.volume[slots].tolist(),
+            self.change[slots].tolist(),
+            self.change_percent[slots].tolist(),
+            (price * MOCK_SHARES_OUTSTANDING).tolist()
+        )
+        return {
+            symbol: {
+                'price': p,
+                'volume': v,
+                'change': c,
+                'change_percent': cp,
+                'market_cap': mc
+            }
+            for symbol, p, v, c, cp, mc in columns
+        }
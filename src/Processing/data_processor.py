@@ -1,5 +1,4 @@
 import logging
-import pandas as pd
 from datetime import datetime
 from Database.database import Database
 
@@ -0,0 +1,7 @@
+"""
+Scheduling package for the metrics collection application.
+Contains the background job scheduler and the store collectors publish to.
+"""
+
+from .scheduler import Scheduler
+from .snapshot_store import SnapshotStore
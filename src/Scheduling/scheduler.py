@@ -0,0 +1,130 @@
+import threading
+import time
+import logging
+from datetime import datetime
+
+
+class _Job:
+    """A function run every `interval` seconds on its own thread."""
+
+    def __init__(self, name, func, interval, run_immediately):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self.thread = None
+        self.stats = {
+            'interval': interval,
+            'runs': 0,
+            'failures': 0,
+            'skipped': 0,
+            'last_run_at': None,
+            'last_duration': 0.0,
+            'total_duration': 0.0,
+            'last_error': None,
+        }
+
+
+class Scheduler:
+    """
+    Runs collector jobs in the background, each on its own interval.
+    Every job gets a dedicated thread, so a slow collector (e.g. one that
+    samples CPU over a second) never delays another. Runs are kept on a fixed
+    cadence; if a run takes longer than the interval, the missed slots are
+    skipped rather than run back to back.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_job(self, name, func, interval, run_immediately=True):
+        """Register func to run every `interval` seconds under name."""
+        if interval <= 0:
+            raise ValueError(f"Interval for job {name} must be positive, got {interval}")
+        with self._lock:
+            if name in self._jobs:
+                raise ValueError(f"Job already scheduled: {name}")
+            job = _Job(name, func, interval, run_immediately)
+            self._jobs[name] = job
+            if self.running():
+                self._start_job(job)
+        return job
+
+    def running(self):
+        """Return True between start() and stop()."""
+        return any(job.thread is not None for job in self._jobs.values())
+
+    def start(self):
+        """Start a thread for every registered job."""
+        with self._lock:
+            self._stop.clear()
+            for job in self._jobs.values():
+                if job.thread is None:
+                    self._start_job(job)
+        return self
+
+    def _start_job(self, job):
+        job.thread = threading.Thread(target=self._run, args=(job,), name=f"scheduler-{job.name}", daemon=True)
+        job.thread.start()
+
+    def stop(self, timeout=10.0):
+        """Stop every job thread, waiting for in-progress runs to finish."""
+        self._stop.set()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        deadline = time.monotonic() + timeout
+        for job in jobs:
+            if job.thread is not None:
+                job.thread.join(max(deadline - time.monotonic(), 0))
+                if job.thread.is_alive():
+                    self.logger.warning(f"Scheduled job {job.name} did not stop within {timeout}s")
+                job.thread = None
+
+    def run_now(self, name):
+        """Run a job once on the calling thread."""
+        self._execute(self._jobs[name])
+
+    def stats(self):
+        """Return run counts and timings per job."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        stats = {}
+        for job in jobs:
+            job_stats = dict(job.stats)
+            runs = job_stats['runs']
+            job_stats['avg_duration'] = job_stats['total_duration'] / runs if runs else 0.0
+            stats[job.name] = job_stats
+        return stats
+
+    def _run(self, job):
+        """Job thread: run on a fixed cadence until the scheduler stops."""
+        next_run = time.monotonic()
+        if not job.run_immediately:
+            next_run += job.interval
+
+        while not self._stop.wait(max(next_run - time.monotonic(), 0)):
+            self._execute(job)
+            next_run += job.interval
+            now = time.monotonic()
+            if next_run < now:
+                missed = int((now - next_run) // job.interval) + 1
+                job.stats['skipped'] += missed
+                next_run += missed * job.interval
+
+    def _execute(self, job):
+        """Run a job once, recording its duration and any error."""
+        started = time.perf_counter()
+        try:
+            job.func()
+        except Exception as e:
+            job.stats['failures'] += 1
+            job.stats['last_error'] = str(e)
+            self.logger.error(f"Error running scheduled job {job.name}: {str(e)}")
+        elapsed = time.perf_counter() - started
+        job.stats['runs'] += 1
+        job.stats['last_run_at'] = datetime.now().isoformat()
+        job.stats['last_duration'] = elapsed
+        job.stats['total_duration'] += elapsed
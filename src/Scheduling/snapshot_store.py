@@ -0,0 +1,43 @@
+import threading
+import time
+
+
+class SnapshotStore:
+    """
+    Shared in-memory store for the latest result of each collector.
+    Writers publish a whole new value under a name; readers get the current
+    value without copying or waiting on a collector. Published values must be
+    treated as read-only, since every reader shares the same object.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def publish(self, name, value):
+        """Replace the snapshot stored under name. Returns its new version."""
+        with self._lock:
+            previous = self._entries.get(name)
+            version = previous[2] + 1 if previous else 1
+            self._entries[name] = (value, time.time(), version)
+        return version
+
+    def get(self, name, default=None):
+        """Return the latest snapshot published under name."""
+        entry = self._entries.get(name)
+        return entry[0] if entry else default
+
+    def age(self, name):
+        """Return seconds since name was last published, or None if it never was."""
+        entry = self._entries.get(name)
+        return time.time() - entry[1] if entry else None
+
+    def stats(self):
+        """Return the version and age of every snapshot."""
+        with self._lock:
+            entries = dict(self._entries)
+        now = time.time()
+        return {
+            name: {'version': version, 'age_seconds': now - published_at}
+            for name, (_, published_at, version) in entries.items()
+        }
@@ -381,6 +381,8 @@ class Visualizer:
                                 <div class="control-group">
                                     <label for="system-interval">Interval:</label>
                                     <select id="system-interval">
+                                        <option value="1m">1 Minute</option>
+                                        <option value="5m">5 Minutes</option>
                                         <option value="hour">Hourly</option>
                                         <option value="day" selected>Daily</option>
                                         <option value="week">Weekly</option>
@@ -434,6 +436,8 @@ class Visualizer:
                                 <div class="control-group">
                                     <label for="stock-interval">Interval:</label>
                                     <select id="stock-interval">
+                                        <option value="1m">1 Minute</option>
+                                        <option value="5m">5 Minutes</option>
                                         <option value="hour">Hourly</option>
                                         <option value="day" selected>Daily</option>
                                         <option value="week">Weekly</option>
@@ -507,6 +511,8 @@ class Visualizer:
                                 <div class="control-group" id="custom-interval-group">
                                     <label for="custom-interval">Interval:</label>
                                     <select id="custom-interval">
+                                        <option value="1m">1 Minute</option>
+                                        <option value="5m">5 Minutes</option>
                                         <option value="hour">Hourly</option>
                                         <option value="day" selected>Daily</option>
                                         <option value="week">Weekly</option>
@@ -686,9 +692,10 @@ class Visualizer:
                         startDate.setDate(startDate.getDate() - 30);
                     }
                     
+                    // Keep the 'Z': the server reads times without an offset as its local time
                     return {
-                        start: startDate.toISOString().split('.')[0].replace('T', ' '),
-                        end: now.toISOString().split('.')[0].replace('T', ' ')
+                        start: startDate.toISOString(),
+                        end: now.toISOString()
                     };
                 }
                 
@@ -0,0 +1,79 @@
+import copy
+import os
+import shutil
+import sys
+import tempfile
+import time
+from flask import Flask
+from config.config_loader import get_config
+from Database.database import Database
+from Monitoring.stock_monitor import StockMonitor
+from Visualization.visualizer import Visualizer
+from main import build_registry, create_app
+
+
+def create_legacy_app(db_path, symbols):
+    """The previous dashboard route: a new Database and StockMonitor on every request."""
+    app = Flask(__name__)
+    visualizer = Visualizer()
+
+    @app.route('/')
+    def index():
+        monitor = StockMonitor(symbols=symbols, database=Database(db_path))
+        try:
+            return visualizer.get_dashboard(monitor.get_metrics())
+        finally:
+            monitor.db.close()
+
+    return app
+
+
+def time_requests(app, path, count):
+    """GET path count times through the test client. Returns sorted latencies in milliseconds."""
+    client = app.test_client()
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise AssertionError(f"GET {path} returned {response.status_code}")
+    return sorted(latencies)
+
+
+def percentile(latencies, fraction):
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def run_benchmark(count=200):
+    """Time GET / on the per-request legacy route and on the registry-backed app."""
+    workdir = tempfile.mkdtemp()
+    try:
+        config = copy.deepcopy(get_config())
+        config['database']['path'] = os.path.join(workdir, 'benchmark.db')
+        symbols = config['monitoring']['stocks']['symbols']
+
+        # The registry-backed app renders the stocks collector's snapshot
+        components = build_registry(config)
+        try:
+            app = create_app(config, components, start=False)
+            components.get('runner').run('stocks')
+            after = time_requests(app, '/', count)
+        finally:
+            components.close()
+
+        before = time_requests(create_legacy_app(config['database']['path'], symbols), '/', count)
+        return before, after
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"GET / latency over {count} requests")
+    print(f"{'route':>10} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    before, after = run_benchmark(count)
+    for name, latencies in (('legacy', before), ('registry', after)):
+        mean = sum(latencies) / len(latencies)
+        print(f"{name:>10} {mean:>10.3f} {percentile(latencies, 0.5):>10.3f} {percentile(latencies, 0.95):>10.3f}")
+    print(f"speedup (p50): {percentile(before, 0.5) / percentile(after, 0.5):.1f}x")
@@ -1,7 +1,24 @@
 import json
+import threading
 from pathlib import Path
 
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent / 'config.json'
+
+_cache = {}
+_cache_lock = threading.Lock()
+
 def load_config(config_path):
     """Load configuration from JSON file."""
     with open(config_path) as f:
-        return json.load(f) 
\ No newline at end of file
+        return json.load(f)
+
+def get_config(config_path=DEFAULT_CONFIG_PATH):
+    """
+    Return the configuration from config_path, parsed on first use and shared
+    by every later caller. Callers must treat it as read-only.
+    """
+    key = Path(config_path).resolve()
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = load_config(key)
+        return _cache[key]
@@ -1,9 +1,8 @@
 import json
 import logging
+import threading
 import time
-from pathlib import Path
-from Monitoring.system_monitor import SystemMonitor
-from Monitoring.stock_monitor import StockMonitor
+from Monitoring.collector import CollectorRunner
 from Processing.data_processor import DataProcessor
 from Visualization.visualizer import Visualizer
 from flask import Flask, request, jsonify, render_template
@@ -12,200 +11,309 @@ from API.remote_control import RemoteControl
 from dotenv import load_dotenv
 import os
 from custom_logging.logger import LoggerSingleton
-from config.config_loader import load_config
+from config.config_loader import get_config
 from Database.database import Database
-import sqlite3
+from Database.write_behind import WriteBehindWriter
+from Database.migrate_timestamps import TimestampMigrator
+from Database.retention import RetentionManager
+from Scheduling.scheduler import Scheduler
+from Scheduling.snapshot_store import SnapshotStore
+from App.registry import ComponentRegistry
+from API.response_cache import ResponseCache, device_tag, series_tag
 
 # Add this near the top of the file, before any code that uses environment variables
 load_dotenv()
 
+def build_registry(config):
+    """
+    Register the application components. Nothing is built until first used,
+    and every route and background job shares the same instances.
+    """
+    components = ComponentRegistry(config)
+
+    def create_database(components):
+        # Get absolute path for the database
+        project_root = os.path.dirname(os.path.abspath(__file__))
+        db_path = os.path.join(os.path.dirname(project_root), config['database']['path'])
+        return Database(db_path)
+
+    def create_runner(components):
+        snapshots = components.get('snapshots')
+        data_processor = components.get('data_processor')
+        publish_lock = threading.Lock()
+
+        def publish_metrics(name):
+            """Combine the latest collector snapshots into the /metrics payload."""
+            with publish_lock:
+                system_data = snapshots.get('system')
+                stock_data = snapshots.get('stocks')
+                metrics = {}
+                if system_data is not None and stock_data is not None:
+                    metrics = data_processor.process(system_data, stock_data)
+                for collector_name in runner.collectors:
+                    data = snapshots.get(collector_name)
+                    if data is not None:
+                        metrics.setdefault(collector_name, data)
+                snapshots.publish('metrics', metrics)
+
+        # Collectors and their intervals come from the collectors config section
+        runner = CollectorRunner.from_config(
+            config, {'database': components.get('database')}, snapshots,
+            writer=components.get('writer'), on_publish=publish_metrics
+        )
+        return runner
+
+    components.register('database', create_database, close=Database.close)
+    # Buffer metric writes so requests never wait on SQLite
+    components.register('writer', lambda components: WriteBehindWriter.from_config(
+        components.get('database'), config['database'].get('write_behind', {})
+    ), close=WriteBehindWriter.close)
+    # Purge expired samples and rollups in the background
+    components.register('retention', lambda components: RetentionManager.from_config(
+        components.get('database'), config['database'].get('retention', {})
+    ), close=RetentionManager.stop)
+    components.register('data_processor', lambda components: DataProcessor(components.get('database')))
+    components.register('visualizer', lambda components: Visualizer())
+    components.register('remote_control', lambda components: RemoteControl())
+    # Collectors run in the background and publish their latest results here
+    components.register('snapshots', lambda components: SnapshotStore())
+    components.register('runner', create_runner, close=CollectorRunner.close)
+    components.register('scheduler', lambda components: Scheduler(), close=Scheduler.stop)
+
+    def create_response_cache(components):
+        response_cache = ResponseCache.from_config(config['server'].get('response_cache', {}))
+        # New samples invalidate the cached history responses built from their series
+        components.get('database').add_write_listener(response_cache.on_write)
+        return response_cache
+
+    components.register('response_cache', create_response_cache)
+    return components
+
+def start_background(components):
+    """Start the background work: timestamp migration, write-behind, retention and collectors."""
+    config = components.config
+    
+    # Convert rows written before the epoch ts column existed, in the background
+    timestamp_migrator = TimestampMigrator(components.get('database'))
+    if timestamp_migrator.pending():
+        timestamp_migrator.start()
+    
+    components.get('writer').start()
+    if config['database'].get('retention', {}).get('enabled', False):
+        components.get('retention').start()
+    
+    # The scheduler is created after the runner, so on close it stops before the collectors do
+    runner = components.get('runner')
+    scheduler = components.get('scheduler')
+    runner.schedule(scheduler)
+    scheduler.start()
+
+def create_app(config, components=None, start=True):
+    """
+    Build the Flask app. Routes look up the long-lived components in the
+    registry (stored as app.extensions['components']) instead of building
+    their own. With start=False no background work is started.
+    """
+    if components is None:
+        components = build_registry(config)
+    if start:
+        start_background(components)
+
+    app = Flask(__name__)
+    app.extensions['components'] = components
+    response_cache = components.get('response_cache')
+    
+    @app.route('/metrics')
+    # @require_auth
+    def get_metrics():
+        metrics = components.get('snapshots').get('metrics')
+        if metrics is None:
+            return jsonify({'message': 'Metrics have not been collected yet'}), 503
+        return metrics
+
+    @app.route('/')
+    def index():
+        # Render the stocks collector's latest snapshot instead of fetching per request
+        metrics = components.get('snapshots').get('stocks') or {'timestamp': None, 'data': {}}
+        return components.get('visualizer').get_dashboard(metrics)
+
+    @app.route('/history')
+    def history_dashboard():
+        return components.get('visualizer').get_history_dashboard()
+
+    @app.route('/api/history/system', methods=['GET'])
+    @response_cache.cached(lambda: [device_tag("PC")])
+    def get_system_history():
+        limit = request.args.get('limit', default=100, type=int)
+        system_metrics = components.get('database').get_system_metrics(limit)
+        return jsonify(system_metrics)
+
+    @app.route('/api/history/stock/<symbol>', methods=['GET'])
+    @response_cache.cached(lambda symbol: [device_tag(f"Stock-{symbol}")])
+    def get_stock_history(symbol):
+        limit = request.args.get('limit', default=100, type=int)
+        stock_metrics = components.get('database').get_stock_metrics(symbol, limit)
+        return jsonify(stock_metrics)
+
+    @app.route('/api/devices', methods=['GET'])
+    def get_devices():
+        """Get a list of all devices in the database."""
+        with components.get('database').pool.reader() as conn:
+            cursor = conn.execute("""
+                SELECT device_id, device_name, device_type, created_at
+                FROM devices
+                ORDER BY device_name
+            """)
+
+            devices = []
+            for row in cursor.fetchall():
+                devices.append({
+                    'id': row[0],
+                    'name': row[1],
+                    'type': row[2],
+                    'created_at': row[3]
+                })
+
+            return jsonify(devices)
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics_list():
+        """Get a list of all metrics in the database."""
+        with components.get('database').pool.reader() as conn:
+            cursor = conn.execute("""
+                SELECT metric_id, metric_name, metric_type, unit, created_at
+                FROM metrics
+                ORDER BY metric_name
+            """)
+
+            metrics = []
+            for row in cursor.fetchall():
+                metrics.append({
+                    'id': row[0],
+                    'name': row[1],
+                    'type': row[2],
+                    'unit': row[3],
+                    'created_at': row[4]
+                })
+
+            return jsonify(metrics)
+
+    @app.route('/api/device/<device_name>/metric/<metric_name>/history', methods=['GET'])
+    @response_cache.cached(lambda device_name, metric_name: [series_tag(device_name, metric_name)])
+    def get_metric_history(device_name, metric_name):
+        """Get historical data for a specific device and metric."""
+        start_time = request.args.get('start_time')
+        end_time = request.args.get('end_time')
+        interval = request.args.get('interval', default='hour')
+
+        if request.args.get('aggregate', default='false').lower() == 'true':
+            # Get aggregated data
+            data = components.get('database').get_metrics_aggregated(device_name, metric_name, interval, start_time, end_time)
+            result = []
+            for row in data:
+                result.append({
+                    'time_bucket': row[0],
+                    'avg_value': row[1],
+                    'min_value': row[2],
+                    'max_value': row[3],
+                    'count': row[4],
+                    'sum_value': row[5],
+                    'last_value': row[6]
+                })
+        else:
+            # Get raw data
+            data = components.get('database').get_metrics_by_timerange(device_name, metric_name, start_time, end_time)
+            result = []
+            for row in data:
+                result.append({
+                    'timestamp': row[0],
+                    'value': row[1]
+                })
+
+        return jsonify(result)
+
+    @app.route('/api/database/pool', methods=['GET'])
+    def get_pool_stats():
+        """Get connection pool statistics."""
+        return jsonify(components.get('database').pool_stats())
+
+    @app.route('/api/database/writer', methods=['GET'])
+    def get_writer_stats():
+        """Get write-behind queue depth and flush latency counters."""
+        return jsonify(components.get('writer').stats())
+
+    @app.route('/api/database/retention', methods=['GET'])
+    def get_retention_stats():
+        """Get rows purged and time spent by the retention policy."""
+        return jsonify(components.get('retention').stats())
+
+    @app.route('/api/scheduler', methods=['GET'])
+    def get_scheduler_stats():
+        """Get run counts and timings per collector, and the age of each snapshot."""
+        return jsonify({
+            'jobs': components.get('scheduler').stats(),
+            'snapshots': components.get('snapshots').stats()
+        })
+
+    @app.route('/api/collectors', methods=['GET'])
+    def get_collector_stats():
+        """Get duration, error counts and staleness per collector."""
+        return jsonify(components.get('runner').stats())
+
+    @app.route('/command', methods=['POST'])
+    # @require_auth
+    def execute_command():
+        data = request.get_json()
+        command = data.get('command')
+        params = data.get('params', {})
+        try:
+            result = components.get('remote_control').execute_command(command, params)
+            return jsonify({'success': True, 'result': result})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+    @app.route('/login', methods=['POST'])
+    def login():
+        # For testing purposes, we'll use a simple authentication
+        # In production, you should validate against a database
+        auth_data = request.get_json()
+        if auth_data and auth_data.get('username') == 'admin' and auth_data.get('password') == 'admin':
+            token = generate_token('admin')
+            return jsonify({'token': token})
+        return jsonify({'message': 'Invalid credentials'}), 401
+
+    @app.route('/api/cache', methods=['GET'])
+    def get_cache_stats():
+        """Get hit rate, size and invalidation counters of the history response cache."""
+        return jsonify(response_cache.stats())
+
+    @app.route('/api/components', methods=['GET'])
+    def get_component_stats():
+        """Get the registered components and the ones built so far."""
+        return jsonify(components.stats())
+
+    return app
+
 def main():
     
-    # Load configuration
-    config_path = Path('src/config/config.json')
-    config = load_config(config_path)
+    # Load configuration, parsed once and shared with every component
+    config = get_config()
     
     # Initialize logging singleton
     LoggerSingleton(config)
     logger = LoggerSingleton.get_logger(__name__)
 
     try:
-        # Initialize components
-        system_monitor = SystemMonitor()
-        
-        # Get absolute path for the database
-        project_root = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(os.path.dirname(project_root), config['database']['path'])
-        database = Database(db_path)  # Initialize the database with absolute path
-        
-        # Initialize components with the database instance
-        stock_monitor = StockMonitor(config['monitoring']['stocks']['symbols'], database)
-        data_processor = DataProcessor(database)
-        visualizer = Visualizer()
-        remote_control = RemoteControl()
-
-        # Start Flask server
-        app = Flask(__name__)
-        
-        @app.route('/metrics')
-        # @require_auth
-        def get_metrics():
-            system_data = system_monitor.get_metrics()
-            stock_data = stock_monitor.get_metrics()
-            processed_data = data_processor.process(system_data, stock_data)
-            
-            # Store metrics in the database
-            try:
-                # Store system metrics
-                database.store_system_metrics({
-                    'timestamp': processed_data['system']['timestamp'],
-                    'cpu_percent': processed_data['system']['cpu']['usage_percent'],
-                    'memory_percent': processed_data['system']['memory']['percent'],
-                    'disk_percent': processed_data['system']['disk']['percent'],
-                    'running_processes': processed_data['system']['processes']['count'],
-                    'thread_count': processed_data['system']['processes']['threads']
-                })
-                
-                # Store stock metrics
-                database.store_stock_metrics({
-                    'timestamp': processed_data['stocks']['timestamp'],
-                    'stocks': {symbol: {
-                        'price': data['price'],
-                        'volume': data['volume'],
-                        'change': data.get('change', 0),
-                        'change_percent': data.get('change_percent', 0),
-                        'market_cap': data.get('market_cap', 0)
-                    } for symbol, data in processed_data['stocks']['data'].items()}
-                })
-            except Exception as e:
-                logger.error(f"Error storing metrics in database: {str(e)}")
-            
-            return processed_data
-
-        @app.route('/')
-        def index():
-            symbols = config['monitoring']['stocks']['symbols']
-            monitor = StockMonitor(symbols=symbols)
-            metrics = monitor.get_metrics()
-            return visualizer.get_dashboard(metrics)
-            
-        @app.route('/history')
-        def history_dashboard():
-            return visualizer.get_history_dashboard()
-
-        @app.route('/api/history/system', methods=['GET'])
-        def get_system_history():
-            limit = request.args.get('limit', default=100, type=int)
-            system_metrics = database.get_system_metrics(limit)
-            return jsonify(system_metrics)
-
-        @app.route('/api/history/stock/<symbol>', methods=['GET'])
-        def get_stock_history(symbol):
-            limit = request.args.get('limit', default=100, type=int)
-            stock_metrics = database.get_stock_metrics(symbol, limit)
-            return jsonify(stock_metrics)
-            
-        @app.route('/api/devices', methods=['GET'])
-        def get_devices():
-            """Get a list of all devices in the database."""
-            with sqlite3.connect(database.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT device_id, device_name, device_type, created_at
-                    FROM devices
-                    ORDER BY device_name
-                """)
-                
-                devices = []
-                for row in cursor.fetchall():
-                    devices.append({
-                        'id': row[0],
-                        'name': row[1],
-                        'type': row[2],
-                        'created_at': row[3]
-                    })
-                
-                return jsonify(devices)
-                
-        @app.route('/api/metrics', methods=['GET'])
-        def get_metrics_list():
-            """Get a list of all metrics in the database."""
-            with sqlite3.connect(database.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT metric_id, metric_name, metric_type, unit, created_at
-                    FROM metrics
-                    ORDER BY metric_name
-                """)
-                
-                metrics = []
-                for row in cursor.fetchall():
-                    metrics.append({
-                        'id': row[0],
-                        'name': row[1],
-                        'type': row[2],
-                        'unit': row[3],
-                        'created_at': row[4]
-                    })
-                
-                return jsonify(metrics)
-                
-        @app.route('/api/device/<device_name>/metric/<metric_name>/history', methods=['GET'])
-        def get_metric_history(device_name, metric_name):
-            """Get historical data for a specific device and metric."""
-            start_time = request.args.get('start_time')
-            end_time = request.args.get('end_time')
-            interval = request.args.get('interval', default='hour')
-            
-            if request.args.get('aggregate', default='false').lower() == 'true':
-                # Get aggregated data
-                data = database.get_metrics_aggregated(device_name, metric_name, interval, start_time, end_time)
-                result = []
-                for row in data:
-                    result.append({
-                        'time_bucket': row[0],
-                        'avg_value': row[1],
-                        'min_value': row[2],
-                        'max_value': row[3],
-                        'count': row[4]
-                    })
-            else:
-                # Get raw data
-                data = database.get_metrics_by_timerange(device_name, metric_name, start_time, end_time)
-                result = []
-                for row in data:
-                    result.append({
-                        'timestamp': row[0],
-                        'value': row[1]
-                    })
-                
-            return jsonify(result)
-
-        @app.route('/command', methods=['POST'])
-        # @require_auth
-        def execute_command():
-            data = request.get_json()
-            command = data.get('command')
-            params = data.get('params', {})
-            try:
-                result = remote_control.execute_command(command, params)
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'success': False, 'error': str(e)}), 400
-
-        @app.route('/login', methods=['POST'])
-        def login():
-            # For testing purposes, we'll use a simple authentication
-            # In production, you should validate against a database
-            auth_data = request.get_json()
-            if auth_data and auth_data.get('username') == 'admin' and auth_data.get('password') == 'admin':
-                token = generate_token('admin')
-                return jsonify({'token': token})
-            return jsonify({'message': 'Invalid credentials'}), 401
-
-        # Run the Flask app
-        app.run(
-            host=config['server']['host'],
-            port=config['server']['port']
-        )
+        components = build_registry(config)
+        try:
+            app = create_app(config, components)
+            app.run(
+                host=config['server']['host'],
+                port=config['server']['port']
+            )
+        finally:
+            # Stop the collectors and flush buffered metrics on shutdown
+            components.close()
 
     except Exception as e:
         logger.error(f"Application error: {str(e)}")
@@ -0,0 +1,71 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module='main'):
+    """
+    Import module in a fresh interpreter with -X importtime.
+    Returns (name, self_us, cumulative_us, depth) rows in import order for
+    module and everything it imported; interpreter startup (site) is left out.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1]}")
+
+    # Children are listed before their parent, so a top-level row closes its group
+    group = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        group.append((name, int(self_us), int(cumulative_us), depth))
+        if depth == 0:
+            if name == module:
+                return group
+            group = []
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def is_first_party(name):
+    """True for modules that live under src/ (main and the application packages)."""
+    top = name.split('.')[0]
+    return top == 'main' or os.path.isdir(os.path.join(SRC_DIR, top))
+
+
+def summarize(rows):
+    """Return the self time per top-level package, largest first, in microseconds."""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+if __name__ == "__main__":
+    top_n = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    module = sys.argv[2] if len(sys.argv) > 2 else 'main'
+    rows = profile_imports(module)
+    total = rows[-1][2]
+
+    print(f"Importing {module} took {total / 1000:.1f} ms ({len(rows)} modules)")
+    print()
+    print(f"{'package':<28} {'self (ms)':>10} {'share':>7}  origin")
+    for name, self_us in summarize(rows)[:top_n]:
+        origin = 'app' if is_first_party(name) else 'third-party/stdlib'
+        print(f"{name:<28} {self_us / 1000:>10.1f} {self_us / total:>6.1%}  {origin}")
+    print()
+    print(f"{'module':<40} {'cumulative (ms)':>16}")
+    for name, _, cumulative, depth in sorted(rows, key=lambda row: row[2], reverse=True)[:top_n]:
+        print(f"{'  ' * depth + name:<40} {cumulative / 1000:>16.1f}")